@@ -8,8 +8,11 @@ from matplotlib import pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from matplotlib.figure import Figure
 import struct
+import os
 import math
 from numpy.lib.stride_tricks import sliding_window_view
+from result_cache import ResultCache
+from background_worker import BackgroundWorker
 
 np.random.seed(100)
 
@@ -25,21 +28,39 @@ def get_image_data (image):
     image_array = np.array(image)  # 获取图像的像素数据并转化为数组
     return height, width, image_array
 
-''' 
-@brief 读取raw文件
+'''
+@brief 读取raw文件，以只读的方式将像素数据映射到内存，不会为每个像素创建Python对象
 @param file_name: raw文件路径
-@return raw_array: raw文件图像数组
+@param row_range: 需要读取的行范围(起始行, 结束行)，不包含结束行，为None时读取整幅图像
+@return raw_array: raw文件图像数组，为只读的uint8内存映射数组
 '''
-def read_raw (file_name):
-    # 获取raw文件表示的图片的数据
+def read_raw (file_name, row_range = None):
+    # 读取文件头，文件头为图片的宽度和高度，各占4个字节
     raw_file = open(file_name, "rb")  # 打开文件，以只读、二进制的方式打开
-    raw_width = struct.unpack("i", raw_file.read(4))[0]  # 获取raw文件表示的图片的宽度
-    raw_height = struct.unpack("i", raw_file.read(4))[0]  # 获取raw文件表示的图片的高度
-    raw_data = struct.unpack(f"{raw_width * raw_height}B", raw_file.read())  # 获取raw文件表示的图片的数组
+    header = raw_file.read(8)
     raw_file.close()  # 关闭文件
+    if len(header) < 8:
+        raise ValueError(f"{file_name}不是有效的raw文件：文件头不完整")
+    raw_width, raw_height = struct.unpack("ii", header)  # 获取raw文件表示的图片的宽度和高度
+
+    # 检查文件头与文件大小是否一致
+    if raw_width <= 0 or raw_height <= 0:
+        raise ValueError(f"{file_name}不是有效的raw文件：宽度为{raw_width}，高度为{raw_height}")
+    if os.path.getsize(file_name) != 8 + raw_width * raw_height:
+        raise ValueError(f"{file_name}不是有效的raw文件：文件大小与{raw_width}*{raw_height}的图像不符")
+
+    # 计算需要映射的行范围
+    if row_range is None:
+        row_start, row_stop = 0, raw_height
+    else:
+        row_start, row_stop, _ = slice(*row_range).indices(raw_height)
+    if row_stop <= row_start:
+        raise ValueError(f"行范围{row_range}超出了图像的高度{raw_height}")
 
-    # 将获取到的数组转换为二维数组
-    raw_array = np.array(raw_data).reshape((raw_height, raw_width))
+    # 只映射需要的行，像素数据直接作为uint8数组使用
+    raw_array = np.memmap(file_name, dtype = np.uint8, mode = "r",
+                          offset = 8 + row_start * raw_width,
+                          shape = (row_stop - row_start, raw_width))
 
     return raw_array
 
@@ -57,14 +78,17 @@ def show_transform_image (image_array):
     # 显示分割后的图片
     transform_image_label.config(image = transform_image_tk)
 
-def kmeans_segmentation (image_array, k):
+def kmeans_segmentation (image_array, k, rng = None):
+    if rng is None:
+        rng = np.random.default_rng()
+
     # 得到图像行数和列数
     rows = image_array.shape[0]
     columns = image_array.shape[1]
     
     # 在图像中随机选取k个点，作为最初的类中心
-    label_centers_row = np.random.randint(0, rows, size = k)
-    label_centers_column = np.random.randint(0, columns, size = k)
+    label_centers_row = rng.integers(0, rows, size = k)
+    label_centers_column = rng.integers(0, columns, size = k)
     label_centers = image_array[label_centers_row, label_centers_column]
     label_centers = label_centers.astype(np.float64)
 
@@ -97,9 +121,9 @@ def kmeans_segmentation (image_array, k):
             values = image_array[labels == label]
             if values.size == 0:
                 if image_array.ndim == 2:
-                    label_centers[label - 1] = np.random.randint(0, 256)
+                    label_centers[label - 1] = rng.integers(0, 256)
                 elif image_array.ndim == 3:
-                    label_centers[label - 1] = np.random.randint(0, 256, size = 3)
+                    label_centers[label - 1] = rng.integers(0, 256, size = 3)
             else:
                 if image_array.ndim == 2:  # 灰度图像
                     label_centers[label - 1] = values.mean()
@@ -108,20 +132,34 @@ def kmeans_segmentation (image_array, k):
 
     return labels
 
-def image_kmeans_segmentation ():
-    global k
-    result = np.copy(image_array)
+'''
+@brief 计算k均值分割后用于显示的图像
+@param k: 类别数量
+@param array: 图像数组
+@param key: 图像的缓存键
+@return result: 分割后的图像数组
+'''
+def get_kmeans_result (k, array, key):
+    result = np.copy(array)
+    rng = np.random.default_rng()  # 每次计算使用自己的随机数生成器，不与其他线程共用随机状态
+    colors = rng.integers(0, 256, size = (k, 3))
 
-    # k均值
-    labels = kmeans_segmentation(image_array, k)
+    # k均值，k相同时直接从缓存中取出
+    labels = result_cache.get_or_compute(key, "kmeans", (k,), lambda: kmeans_segmentation(array, k, rng))
 
     for i in range(k):
-        if image_array.ndim == 2:  # 灰度图像
+        if array.ndim == 2:  # 灰度图像
             grayscale = int(i / (k - 1) * 255)
             result[labels == i + 1] = grayscale
-        elif image_array.ndim == 3:  # RGB图像
-            rgb_value = np.random.randint(0, 256, size = 3)
-            result[labels == i + 1] = rgb_value
+        elif array.ndim == 3:  # RGB图像
+            result[labels == i + 1] = colors[i]
+
+    return result
+
+def image_kmeans_segmentation ():
+    global k
+    background_worker.cancel("kmeans")  # 丢弃还没有显示的滑动条结果
+    result = get_kmeans_result(k, image_array, image_key)
 
     show_transform_image(result)
     transform_image_tip.config(text = "k均值分割")
@@ -130,10 +168,15 @@ def image_kmeans_segmentation ():
 def update_kmeans (k_):
     global k
     k = int(k_)
-    image_kmeans_segmentation()
+
+    # 在后台线程中计算，只显示最后一次滑动的结果，图像和缓存键在提交时确定
+    k_value = k
+    array = image_array
+    key = image_key
+    background_worker.submit("kmeans", lambda: get_kmeans_result(k_value, array, key), show_transform_image)
 
 def file_operation ():
-    global origin_image_tk, image_array
+    global origin_image_tk, image_array, image_key
 
     # 获取文件路径
     file_path = fd.askopenfilename()
@@ -157,6 +200,9 @@ def file_operation ():
         image = Image.open(file_path)
         _, _, image_array = get_image_data(image)
 
+    image_key = result_cache.array_key(image_array)  # 图像内容的哈希，作为缓存的键
+    background_worker.cancel("kmeans")  # 丢弃上一幅图像还没有显示的结果
+
     # 转换为tkinter能解析的PhotoImage对象   
     origin_image_tk = ImageTk.PhotoImage(image)
 
@@ -171,6 +217,9 @@ if __name__ == "__main__":
     # 初始化
     k = 2
 
+    # k均值分割结果缓存
+    result_cache = ResultCache(max_bytes = 256 * 1024 * 1024)
+
     # 创建基本界面
     root = tk.Tk()
     root.title("数字图像处理实验十: 基于机器学习的图像分割")  # 设置界面标题
@@ -234,5 +283,10 @@ if __name__ == "__main__":
     kmeas_scale = tk.Scale(scale_frame, from_ = 2, to = 30, orient = "horizontal", length = 150, command = update_kmeans)
     kmeas_scale.grid(row = 0, column = 0)
     kmeas_scale.set(k)
+    busy_label = ttk.Label(scale_frame)  # 后台计算时显示提示
+    busy_label.grid(row = 1, column = 0)
+
+    # 滑动条触发的计算在后台线程中进行
+    background_worker = BackgroundWorker(root, busy_label = busy_label)
 
     root.mainloop()
\ No newline at end of file
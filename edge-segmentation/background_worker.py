@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor
+
+class BackgroundWorker:
+    '''
+    @brief 初始化，耗时的计算放到后台线程中进行，界面线程只负责提交任务和显示结果
+    @param root: tkinter的根窗口
+    @param busy_label: 用于显示“计算中”提示的Label，为None时只改变鼠标样式
+    @param delay: 防抖时间（毫秒），在这段时间内重复提交的同名任务只执行最后一次
+    @param poll_interval: 检查后台任务是否完成的时间间隔（毫秒）
+    '''
+    def __init__ (self, root, busy_label = None, delay = 50, poll_interval = 20):
+        self.root = root
+        self.busy_label = busy_label
+        self.delay = delay
+        self.poll_interval = poll_interval
+        self.executor = ThreadPoolExecutor(max_workers = 1)  # 单线程，任务之间按顺序执行，但会与界面线程同时运行
+        self.pending = {}  # 等待防抖结束的任务，任务名 -> after的id
+        self.jobs = {}  # 每个任务名最新的后台任务，任务名 -> (future, on_done)
+        self.polling = False  # 是否正在检查后台任务
+
+    '''
+    @brief 提交任务，同名的旧任务如果还没有开始则取消，已经开始的旧任务的结果会被丢弃
+    @param name: 任务名，例如某个滑动条对应的操作
+    @param compute: 在后台线程中执行的无参函数，不能操作界面，也不能修改界面线程使用的对象，所需的参数应在提交时确定
+    @param on_done: 在界面线程中执行的函数，参数为compute的返回值
+    '''
+    def submit (self, name, compute, on_done):
+        # 防抖，取消还在等待的同名任务
+        if name in self.pending:
+            self.root.after_cancel(self.pending[name])
+        self.pending[name] = self.root.after(self.delay, lambda: self.start_job(name, compute, on_done))
+        self.show_busy(True)
+
+    '''
+    @brief 取消同名任务，已经开始的任务无法停止，会继续运行，但结果会被丢弃，用于界面直接显示了新的结果的情况
+    @param name: 任务名
+    '''
+    def cancel (self, name):
+        if name in self.pending:
+            self.root.after_cancel(self.pending.pop(name))
+        if name in self.jobs:
+            future, _ = self.jobs.pop(name)
+            future.cancel()
+        if not self.pending and not self.jobs:
+            self.show_busy(False)
+
+    '''
+    @brief 防抖结束后将任务交给后台线程
+    @param name: 任务名
+    @param compute: 在后台线程中执行的无参函数
+    @param on_done: 在界面线程中执行的函数
+    '''
+    def start_job (self, name, compute, on_done):
+        del self.pending[name]
+
+        # 同名的旧任务已经过时
+        if name in self.jobs:
+            old_future, _ = self.jobs[name]
+            old_future.cancel()
+
+        self.jobs[name] = (self.executor.submit(compute), on_done)
+
+        if not self.polling:
+            self.polling = True
+            self.root.after(self.poll_interval, self.poll)
+
+    '''
+    @brief 在界面线程中检查后台任务，完成的最新任务通过on_done显示结果
+    @param none
+    '''
+    def poll (self):
+        for name, (future, on_done) in list(self.jobs.items()):
+            if not future.done():
+                continue
+
+            del self.jobs[name]
+            error = future.exception()
+            if error is not None:
+                self.root.report_callback_exception(type(error), error, error.__traceback__)
+            else:
+                on_done(future.result())
+
+        if self.jobs:
+            self.root.after(self.poll_interval, self.poll)
+        else:
+            self.polling = False
+            if not self.pending:
+                self.show_busy(False)
+
+    '''
+    @brief 显示或隐藏“计算中”的提示
+    @param busy: 是否正在计算
+    '''
+    def show_busy (self, busy):
+        self.root.config(cursor = "watch" if busy else "")
+        if self.busy_label is not None:
+            self.busy_label.config(text = "计算中..." if busy else "")
@@ -8,8 +8,11 @@ from matplotlib import pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from matplotlib.figure import Figure
 import struct
+import os
 import math
 from filter_design import ImgFilter
+from result_cache import ResultCache
+from background_worker import BackgroundWorker
 import cv2 as cv
 
 '''
@@ -24,21 +27,39 @@ def get_image_data (image):
     image_array = np.array(image)  # 获取图像的像素数据并转化为数组
     return height, width, image_array
 
-''' 
-@brief 读取raw文件
+'''
+@brief 读取raw文件，以只读的方式将像素数据映射到内存，不会为每个像素创建Python对象
 @param file_name: raw文件路径
-@return raw_array: raw文件图像数组
+@param row_range: 需要读取的行范围(起始行, 结束行)，不包含结束行，为None时读取整幅图像
+@return raw_array: raw文件图像数组，为只读的uint8内存映射数组
 '''
-def read_raw (file_name):
-    # 获取raw文件表示的图片的数据
+def read_raw (file_name, row_range = None):
+    # 读取文件头，文件头为图片的宽度和高度，各占4个字节
     raw_file = open(file_name, "rb")  # 打开文件，以只读、二进制的方式打开
-    raw_width = struct.unpack("i", raw_file.read(4))[0]  # 获取raw文件表示的图片的宽度
-    raw_height = struct.unpack("i", raw_file.read(4))[0]  # 获取raw文件表示的图片的高度
-    raw_data = struct.unpack(f"{raw_width * raw_height}B", raw_file.read())  # 获取raw文件表示的图片的数组
+    header = raw_file.read(8)
     raw_file.close()  # 关闭文件
+    if len(header) < 8:
+        raise ValueError(f"{file_name}不是有效的raw文件：文件头不完整")
+    raw_width, raw_height = struct.unpack("ii", header)  # 获取raw文件表示的图片的宽度和高度
+
+    # 检查文件头与文件大小是否一致
+    if raw_width <= 0 or raw_height <= 0:
+        raise ValueError(f"{file_name}不是有效的raw文件：宽度为{raw_width}，高度为{raw_height}")
+    if os.path.getsize(file_name) != 8 + raw_width * raw_height:
+        raise ValueError(f"{file_name}不是有效的raw文件：文件大小与{raw_width}*{raw_height}的图像不符")
+
+    # 计算需要映射的行范围
+    if row_range is None:
+        row_start, row_stop = 0, raw_height
+    else:
+        row_start, row_stop, _ = slice(*row_range).indices(raw_height)
+    if row_stop <= row_start:
+        raise ValueError(f"行范围{row_range}超出了图像的高度{raw_height}")
 
-    # 将获取到的数组转换为二维数组
-    raw_array = np.array(raw_data).reshape((raw_height, raw_width))
+    # 只映射需要的行，像素数据直接作为uint8数组使用
+    raw_array = np.memmap(file_name, dtype = np.uint8, mode = "r",
+                          offset = 8 + row_start * raw_width,
+                          shape = (row_stop - row_start, raw_width))
 
     return raw_array
 
@@ -56,11 +77,34 @@ def show_edge_image (image_array):
     # 显示分割后的图片
     edge_image_label.config(image = edge_image_tk)
 
+'''
+@brief 获取Sobel边缘检测结果，参数相同时直接从缓存中取出
+@param sobel_filter: 进行滤波的ImgFilter对象，Sobel算子大小由它的核函数大小决定
+@param key: 图像的缓存键
+@return Sobel边缘检测结果
+'''
+def get_sobel_result (sobel_filter, key):
+    return result_cache.get_or_compute(key, "sobel", (sobel_filter.kernel_size,), sobel_filter.img_Sobel_filter)
+
+'''
+@brief 获取Canny边缘检测结果，参数相同时直接从缓存中取出
+@param lower_thres: 小阈值
+@param upper_thres: 大阈值
+@param sobel_size: Sobel算子大小
+@param array: 图像数组
+@param key: 图像的缓存键
+@return Canny边缘检测结果
+'''
+def get_canny_result (lower_thres, upper_thres, sobel_size, array, key):
+    return result_cache.get_or_compute(key, "canny", (lower_thres, upper_thres, sobel_size),
+                                       lambda: cv.Canny(array, lower_thres, upper_thres, apertureSize = sobel_size))
+
 def Sobel_Segmentation (kernel_size):
     global edge_method
     edge_method = "sobel"
+    background_worker.cancel("edge")  # 丢弃还没有显示的滑动条结果
     img_filter.set_kernel_size(kernel_size)
-    seg_image_array = img_filter.img_Sobel_filter()
+    seg_image_array = get_sobel_result(img_filter, image_key)
     canny_upper_thres_tip.grid_forget()
     canny_upper_thres_scale.grid_forget()
     canny_lower_thres_tip.grid_forget()
@@ -72,7 +116,8 @@ def Sobel_Segmentation (kernel_size):
 def Canny_Segmentation (lower_thres, upper_thres, sobel_size):
     global edge_method
     edge_method = "canny"
-    canny_image_array = cv.Canny(image_array, lower_thres, upper_thres, apertureSize = sobel_size)
+    background_worker.cancel("edge")  # 丢弃还没有显示的滑动条结果
+    canny_image_array = get_canny_result(lower_thres, upper_thres, sobel_size, image_array, image_key)
     canny_upper_thres_tip.grid(row = 2, column = 0)
     canny_upper_thres_scale.grid(row = 2, column = 1)
     canny_lower_thres_tip.grid(row = 1, column = 0)
@@ -81,27 +126,51 @@ def Canny_Segmentation (lower_thres, upper_thres, sobel_size):
     edge_image_tip.config(text = f"{edge_method}边缘检测")
     scale_frame.grid(row = 3, column = 1)
 
+'''
+@brief 滑动条改变后在后台线程中重新计算，只显示最后一次滑动的结果
+@param none
+'''
+def update_edge_image ():
+    # 记录提交时的参数，后台计算期间全局变量可能被再次修改
+    method = edge_method
+    sobel_size = current_sobel_size
+    lower_thres = current_lower_thres
+    upper_thres = current_upper_thres
+    array = image_array
+    key = image_key
+
+    # 后台任务使用自己的滤波器对象，不会修改界面线程正在使用的img_filter
+    if method == "sobel":
+        sobel_filter = img_filter.copy(sobel_size)
+        compute = lambda: get_sobel_result(sobel_filter, key)
+    elif method == "canny":
+        compute = lambda: get_canny_result(lower_thres, upper_thres, sobel_size, array, key)
+    else:  # 还没有选择边缘检测方法时不需要计算
+        return
+
+    def show_result (edge_image_array):
+        show_edge_image(edge_image_array)
+        edge_image_tip.config(text = f"{method}边缘检测")
+
+    background_worker.submit("edge", compute, show_result)
+
 def update_sobel_kernel_size_and_image (kernel_size):
-    global current_sobel_size, current_upper_thres, current_lower_thres, edge_method
+    global current_sobel_size
     current_sobel_size = int(kernel_size)
-
-    if edge_method == "sobel":
-        Sobel_Segmentation(current_sobel_size)
-    elif edge_method == "canny":
-        Canny_Segmentation(current_lower_thres, current_upper_thres, current_sobel_size)
+    update_edge_image()
 
 def update_canny_lower_thres_and_image (lower_thres):
-    global current_sobel_size, current_upper_thres, current_lower_thres
+    global current_lower_thres
     current_lower_thres = int(lower_thres)
-    Canny_Segmentation(current_lower_thres, current_upper_thres, current_sobel_size)
+    update_edge_image()
 
 def update_canny_upper_thres_and_image (upper_thres):
-    global current_sobel_size, current_upper_thres, current_lower_thres
+    global current_upper_thres
     current_upper_thres = int(upper_thres)
-    Canny_Segmentation(current_lower_thres, current_upper_thres, current_sobel_size)
+    update_edge_image()
 
 def file_operation ():
-    global origin_image_tk, img_filter, image_array
+    global origin_image_tk, img_filter, image_array, image_key
 
     # 获取文件路径
     file_path = fd.askopenfilename()
@@ -127,6 +196,8 @@ def file_operation ():
 
     # 创建图像滤波器类对象
     img_filter = ImgFilter(kernel_size = init_kernel_size, image_array = image_array)
+    image_key = result_cache.array_key(image_array)  # 图像内容的哈希，作为缓存的键
+    background_worker.cancel("edge")  # 丢弃上一幅图像还没有显示的结果
 
     # 转换为tkinter能解析的PhotoImage对象   
     origin_image_tk = ImageTk.PhotoImage(image)
@@ -148,6 +219,9 @@ if __name__ == '__main__':
     current_upper_thres = init_upper_thres
     current_sobel_size = init_kernel_size
 
+    # 边缘检测结果缓存
+    result_cache = ResultCache(max_bytes = 256 * 1024 * 1024)
+
     # 创建基本界面
     root = tk.Tk()
     root.title("数字图像处理实验八：基于边缘的图像分割")  # 设置界面标题
@@ -213,6 +287,11 @@ if __name__ == '__main__':
     canny_upper_thres_scale = tk.Scale(scale_frame, from_ = 0, to = 255, orient = "horizontal", length = 150, command = update_canny_upper_thres_and_image)
     canny_upper_thres_scale.set(init_upper_thres)
     canny_upper_thres_scale.grid(row = 2, column = 1)
+    busy_label = ttk.Label(scale_frame)  # 后台计算时显示提示
+    busy_label.grid(row = 3, column = 0, columnspan = 2)
+
+    # 滑动条触发的计算在后台线程中进行
+    background_worker = BackgroundWorker(root, busy_label = busy_label)
 
     # 创建图像标签
     origin_image_label = ttk.Label(frame)
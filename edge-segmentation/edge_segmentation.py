@@ -8,6 +8,7 @@ from matplotlib import pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from matplotlib.figure import Figure
 import struct
+import os
 import math
 from filter_design import ImgFilter
 
@@ -23,21 +24,39 @@ def get_image_data (image):
     image_array = np.array(image)  # 获取图像的像素数据并转化为数组
     return height, width, image_array
 
-''' 
-@brief 读取raw文件
+'''
+@brief 读取raw文件，以只读的方式将像素数据映射到内存，不会为每个像素创建Python对象
 @param file_name: raw文件路径
-@return raw_array: raw文件图像数组
+@param row_range: 需要读取的行范围(起始行, 结束行)，不包含结束行，为None时读取整幅图像
+@return raw_array: raw文件图像数组，为只读的uint8内存映射数组
 '''
-def read_raw (file_name):
-    # 获取raw文件表示的图片的数据
+def read_raw (file_name, row_range = None):
+    # 读取文件头，文件头为图片的宽度和高度，各占4个字节
     raw_file = open(file_name, "rb")  # 打开文件，以只读、二进制的方式打开
-    raw_width = struct.unpack("i", raw_file.read(4))[0]  # 获取raw文件表示的图片的宽度
-    raw_height = struct.unpack("i", raw_file.read(4))[0]  # 获取raw文件表示的图片的高度
-    raw_data = struct.unpack(f"{raw_width * raw_height}B", raw_file.read())  # 获取raw文件表示的图片的数组
+    header = raw_file.read(8)
     raw_file.close()  # 关闭文件
-
-    # 将获取到的数组转换为二维数组
-    raw_array = np.array(raw_data).reshape((raw_height, raw_width))
+    if len(header) < 8:
+        raise ValueError(f"{file_name}不是有效的raw文件：文件头不完整")
+    raw_width, raw_height = struct.unpack("ii", header)  # 获取raw文件表示的图片的宽度和高度
+
+    # 检查文件头与文件大小是否一致
+    if raw_width <= 0 or raw_height <= 0:
+        raise ValueError(f"{file_name}不是有效的raw文件：宽度为{raw_width}，高度为{raw_height}")
+    if os.path.getsize(file_name) != 8 + raw_width * raw_height:
+        raise ValueError(f"{file_name}不是有效的raw文件：文件大小与{raw_width}*{raw_height}的图像不符")
+
+    # 计算需要映射的行范围
+    if row_range is None:
+        row_start, row_stop = 0, raw_height
+    else:
+        row_start, row_stop, _ = slice(*row_range).indices(raw_height)
+    if row_stop <= row_start:
+        raise ValueError(f"行范围{row_range}超出了图像的高度{raw_height}")
+
+    # 只映射需要的行，像素数据直接作为uint8数组使用
+    raw_array = np.memmap(file_name, dtype = np.uint8, mode = "r",
+                          offset = 8 + row_start * raw_width,
+                          shape = (row_stop - row_start, raw_width))
 
     return raw_array
 
@@ -8,7 +8,13 @@ from matplotlib import pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from matplotlib.figure import Figure
 import struct
+import os
 import math
+import tempfile
+from numpy.lib.stride_tricks import sliding_window_view
+from integral_image import IntegralImage
+from result_cache import ResultCache
+from background_worker import BackgroundWorker
 
 '''
 @brief 获取图像数组
@@ -22,21 +28,39 @@ def get_image_data (image):
     image_array = np.array(image)  # 获取图像的像素数据并转化为数组
     return height, width, image_array
 
-''' 
-@brief 读取raw文件
+'''
+@brief 读取raw文件，以只读的方式将像素数据映射到内存，不会为每个像素创建Python对象
 @param file_name: raw文件路径
-@return raw_array: raw文件图像数组
+@param row_range: 需要读取的行范围(起始行, 结束行)，不包含结束行，为None时读取整幅图像
+@return raw_array: raw文件图像数组，为只读的uint8内存映射数组
 '''
-def read_raw (file_name):
-    # 获取raw文件表示的图片的数据
+def read_raw (file_name, row_range = None):
+    # 读取文件头，文件头为图片的宽度和高度，各占4个字节
     raw_file = open(file_name, "rb")  # 打开文件，以只读、二进制的方式打开
-    raw_width = struct.unpack("i", raw_file.read(4))[0]  # 获取raw文件表示的图片的宽度
-    raw_height = struct.unpack("i", raw_file.read(4))[0]  # 获取raw文件表示的图片的高度
-    raw_data = struct.unpack(f"{raw_width * raw_height}B", raw_file.read())  # 获取raw文件表示的图片的数组
+    header = raw_file.read(8)
     raw_file.close()  # 关闭文件
+    if len(header) < 8:
+        raise ValueError(f"{file_name}不是有效的raw文件：文件头不完整")
+    raw_width, raw_height = struct.unpack("ii", header)  # 获取raw文件表示的图片的宽度和高度
+
+    # 检查文件头与文件大小是否一致
+    if raw_width <= 0 or raw_height <= 0:
+        raise ValueError(f"{file_name}不是有效的raw文件：宽度为{raw_width}，高度为{raw_height}")
+    if os.path.getsize(file_name) != 8 + raw_width * raw_height:
+        raise ValueError(f"{file_name}不是有效的raw文件：文件大小与{raw_width}*{raw_height}的图像不符")
+
+    # 计算需要映射的行范围
+    if row_range is None:
+        row_start, row_stop = 0, raw_height
+    else:
+        row_start, row_stop, _ = slice(*row_range).indices(raw_height)
+    if row_stop <= row_start:
+        raise ValueError(f"行范围{row_range}超出了图像的高度{raw_height}")
 
-    # 将获取到的数组转换为二维数组
-    raw_array = np.array(raw_data).reshape((raw_height, raw_width))
+    # 只映射需要的行，像素数据直接作为uint8数组使用
+    raw_array = np.memmap(file_name, dtype = np.uint8, mode = "r",
+                          offset = 8 + row_start * raw_width,
+                          shape = (row_stop - row_start, raw_width))
 
     return raw_array
 
@@ -60,8 +84,29 @@ def show_filter_image (image_array):
 @return none
 '''
 def update_kernel_size_and_image (kernel_size):
-    img_filter.set_kernel_size(int(kernel_size))
-    filter_image(img_filter.filter_type)
+    filter_str = img_filter.filter_type
+    kernel_size = int(kernel_size)
+    img_filter.set_kernel_size(kernel_size)  # 在界面线程中设置，按键直接计算时使用的就是滑动条当前的值
+
+    # 还没有选择滤波器时不需要计算
+    if filter_str is None:
+        return
+
+    # 后台任务使用自己的滤波器对象和提交时的缓存键，不会修改界面线程正在使用的img_filter
+    job_filter = img_filter.copy(kernel_size)
+    key = image_key
+
+    def compute ():
+        return get_filter_result(filter_str, job_filter, key)
+
+    # 只显示最后一次滑动的结果
+    def show_result (filter_image_array):
+        if img_filter.integral_image is None:  # 保留后台任务计算的积分图，之后的均值滤波不需要重新计算
+            img_filter.integral_image = job_filter.integral_image
+        show_filter_image(filter_image_array)
+        filter_image_tip.config(text = f"{filter_str}滤波后的图像，核函数大小为{kernel_size}")
+
+    background_worker.submit("filter", compute, show_result)
 
 '''
 @brief 重置核函数大小
@@ -71,11 +116,23 @@ def update_kernel_size_and_image (kernel_size):
 def reset_kernel_size_scale ():
     kernel_size_scale.set(init_kernel_size)
 
+'''
+@brief 按滑动条当前的值设置核函数大小，滑动条的回调函数可能还没有执行
+@param none
+@return none
+'''
+def sync_kernel_size ():
+    img_filter.set_kernel_size(int(kernel_size_scale.get()))
+
 class ImgFilter:
-    def __init__ (self, kernel_size, image_array):
+    def __init__ (self, kernel_size, image_array, tile_size = None, backend = "auto"):
         self.kernel_size = kernel_size  # 核函数大小
-        self.image_array = image_array  # 原始图像矩阵
+        self.image_array = image_array  # 原始图像矩阵，可以是read_raw得到的内存映射数组
         self.filter_type = None  # 使用的滤波器类型
+        self.tile_size = tile_size  # 分块大小，为None时整幅图像一次处理
+        self.backend = backend  # 卷积计算方式："auto"、"loop"、"window"、"fft"或"separable"
+        self.fft_kernel_size = 15  # 使用"auto"时，核函数大小不小于该值则使用FFT计算
+        self.integral_image = None  # 原始图像的积分图，第一次均值滤波时计算并缓存
 
     '''
     @brief 设置核函数大小
@@ -85,6 +142,34 @@ class ImgFilter:
     def set_kernel_size (self, kernel_size):
         self.kernel_size = kernel_size
 
+    '''
+    @brief 设置分块大小
+    @param tile_size: 分块的边长，为None时整幅图像一次处理
+    @return none
+    '''
+    def set_tile_size (self, tile_size):
+        self.tile_size = tile_size
+
+    '''
+    @brief 设置卷积计算方式
+    @param backend: "auto"、"loop"、"window"、"fft"或"separable"
+    @return none
+    '''
+    def set_backend (self, backend):
+        self.backend = backend
+
+    '''
+    @brief 复制滤波器，用于后台计算，复制得到的滤波器与原滤波器共用图像数组和已经计算的积分图
+    @param kernel_size: 新滤波器的核函数大小
+    @return 新的ImgFilter对象
+    '''
+    def copy (self, kernel_size):
+        image_filter = ImgFilter(kernel_size, self.image_array, tile_size = self.tile_size, backend = self.backend)
+        image_filter.filter_type = self.filter_type
+        image_filter.fft_kernel_size = self.fft_kernel_size
+        image_filter.integral_image = self.integral_image
+        return image_filter
+
     '''
     @brief 扩展数组，用于二维卷积
     @param none
@@ -110,18 +195,147 @@ class ImgFilter:
 
         return expanded_array
 
+    '''
+    @brief 取出图像中的一块并扩展，扩展方式与expand_array相同，在整幅图像的边界处循环填充
+    @param row_start: 块的起始行
+    @param row_stop: 块的结束行（不包含）
+    @param column_start: 块的起始列
+    @param column_stop: 块的结束列（不包含）
+    @return 扩展后的块
+    '''
+    def expand_tile (self, row_start, row_stop, column_start, column_stop):
+        center_to_bound = int((self.kernel_size - 1) / 2)
+        rows = self.image_array.shape[0]
+        columns = self.image_array.shape[1]
+
+        # 块四周各多取center_to_bound个像素，超出图像的部分取模后从另一侧取
+        row_index = np.arange(row_start - center_to_bound, row_stop + center_to_bound) % rows
+        column_index = np.arange(column_start - center_to_bound, column_stop + center_to_bound) % columns
+
+        # 只读取这一块，对于内存映射数组不会读入整幅图像
+        expanded_tile = np.array(self.image_array[np.ix_(row_index, column_index)], dtype = np.float64)
+
+        return expanded_tile
+
+    '''
+    @brief 分块滤波，每次只处理一个带有边缘的块，结果写入内存映射数组，占用的内存只与分块大小有关
+    @param tile_filter: 块滤波函数，输入扩展后的块，输出这一块的滤波结果
+    @param out_file: 保存结果的文件路径，为None时使用临时文件
+    @return filter_result: 滤波结果，为内存映射数组
+    '''
+    def tiled_filter (self, tile_filter, out_file = None):
+        rows = self.image_array.shape[0]
+        columns = self.image_array.shape[1]
+
+        # 创建保存结果的内存映射数组
+        if out_file is None:
+            out_file = tempfile.TemporaryFile()
+        filter_result = np.memmap(out_file, dtype = np.float64, mode = "w+", shape = (rows, columns))
+
+        # 逐块滤波
+        for row_start in range(0, rows, self.tile_size):
+            row_stop = min(row_start + self.tile_size, rows)
+            for column_start in range(0, columns, self.tile_size):
+                column_stop = min(column_start + self.tile_size, columns)
+                expanded_tile = self.expand_tile(row_start, row_stop, column_start, column_stop)
+                filter_result[row_start : row_stop, column_start : column_stop] = tile_filter(expanded_tile)
+
+        filter_result.flush()
+
+        return filter_result
+
     '''
     @brief 计算二维卷积
     @param kernel_matrix: 核函数矩阵
     @return 二维卷积结果
     '''
     def convolution_2d (self, kernel_matrix):
-        # 核函数边缘与核函数中心之间的距离
-        center_to_bound = int((self.kernel_size - 1) / 2)
+        # 分块模式
+        if self.tile_size is not None:
+            return self.tiled_filter(lambda expanded_tile: self.convolution_valid(expanded_tile, kernel_matrix))
 
         # 扩展数组
         expanded_array = self.expand_array()
 
+        return self.convolution_valid(expanded_array, kernel_matrix)
+
+    '''
+    @brief 计算可分离核函数的二维卷积，核函数为column_vector与row_vector的外积
+    @param column_vector: 纵向的一维核函数
+    @param row_vector: 横向的一维核函数
+    @return 二维卷积结果
+    '''
+    def convolution_2d_separable (self, column_vector, row_vector):
+        # 指定了其他计算方式时，仍按二维核函数计算
+        if self.backend != "auto" and self.backend != "separable":
+            return self.convolution_2d(np.outer(column_vector, row_vector))
+
+        # 先横向再纵向各进行一次一维卷积
+        def separable_valid (expanded_array):
+            temp_array = self.convolution_1d(expanded_array, row_vector, axis = 1)
+            return self.convolution_1d(temp_array, column_vector, axis = 0)
+
+        # 分块模式
+        if self.tile_size is not None:
+            return self.tiled_filter(separable_valid)
+
+        return separable_valid(self.expand_array())
+
+    '''
+    @brief 对已经扩展的数组计算二维卷积，结果的大小为扩展前的大小，根据backend选择计算方式
+    @param expanded_array: 扩展后的数组
+    @param kernel_matrix: 核函数矩阵
+    @return 二维卷积结果
+    '''
+    def convolution_valid (self, expanded_array, kernel_matrix):
+        # 自动选择计算方式
+        backend = self.backend
+        if backend == "auto":
+            if self.separate_kernel(kernel_matrix) is not None:
+                backend = "separable"
+            elif kernel_matrix.shape[0] >= self.fft_kernel_size:
+                backend = "fft"
+            else:
+                backend = "window"
+
+        if backend == "loop":
+            return self.convolution_loop(expanded_array, kernel_matrix)
+        elif backend == "window":
+            return self.convolution_window(expanded_array, kernel_matrix)
+        elif backend == "fft":
+            return self.convolution_fft(expanded_array, kernel_matrix)
+        elif backend == "separable":
+            return self.convolution_separable(expanded_array, kernel_matrix)
+        else:
+            raise ValueError(f"未知的卷积计算方式：{backend}")
+
+    '''
+    @brief 将核函数分解为列向量与行向量的外积
+    @param kernel_matrix: 核函数矩阵
+    @return 列向量和行向量，核函数不可分离时返回None
+    '''
+    def separate_kernel (self, kernel_matrix):
+        u, s, vt = np.linalg.svd(np.asarray(kernel_matrix, dtype = np.float64))
+
+        # 只有一个非零奇异值时核函数的秩为1，可以分离
+        if s[0] == 0 or np.any(s[1:] > s[0] * 1e-10):
+            return None
+
+        column_vector = u[:, 0] * np.sqrt(s[0])
+        row_vector = vt[0, :] * np.sqrt(s[0])
+
+        return column_vector, row_vector
+
+    '''
+    @brief 逐像素循环计算二维卷积
+    @param expanded_array: 扩展后的数组
+    @param kernel_matrix: 核函数矩阵
+    @return 二维卷积结果
+    '''
+    def convolution_loop (self, expanded_array, kernel_matrix):
+        # 核函数边缘与核函数中心之间的距离
+        center_to_bound = int((self.kernel_size - 1) / 2)
+
         # 扩展后的数组的行数和列数
         rows = expanded_array.shape[0]
         columns = expanded_array.shape[1]
@@ -136,6 +350,74 @@ class ImgFilter:
 
         return conv_result
 
+    '''
+    @brief 使用滑动窗口视图计算二维卷积，不复制窗口数据
+    @param expanded_array: 扩展后的数组
+    @param kernel_matrix: 核函数矩阵
+    @return 二维卷积结果
+    '''
+    def convolution_window (self, expanded_array, kernel_matrix):
+        windows = sliding_window_view(expanded_array, kernel_matrix.shape)
+        conv_result = np.einsum("ijkl,kl->ij", windows, kernel_matrix)
+        return conv_result
+
+    '''
+    @brief 使用FFT计算二维卷积，适用于大核函数
+    @param expanded_array: 扩展后的数组
+    @param kernel_matrix: 核函数矩阵
+    @return 二维卷积结果
+    '''
+    def convolution_fft (self, expanded_array, kernel_matrix):
+        kernel_rows = kernel_matrix.shape[0]
+        kernel_columns = kernel_matrix.shape[1]
+
+        # 翻转核函数，使频域相乘对应的是与原方法相同的相关运算
+        flipped_kernel = np.asarray(kernel_matrix, dtype = np.float64)[::-1, ::-1]
+
+        # 频域相乘后取循环卷积中没有发生回绕的部分
+        spectrum = np.fft.rfft2(expanded_array) * np.fft.rfft2(flipped_kernel, s = expanded_array.shape)
+        full_result = np.fft.irfft2(spectrum, s = expanded_array.shape)
+        conv_result = full_result[kernel_rows - 1 :, kernel_columns - 1 :]
+
+        return conv_result
+
+    '''
+    @brief 沿一个方向计算一维卷积，只保留不需要填充的部分
+    @param array: 输入数组
+    @param vector: 一维核函数
+    @param axis: 卷积方向，0为纵向，1为横向
+    @return 一维卷积结果
+    '''
+    def convolution_1d (self, array, vector, axis):
+        length = array.shape[axis] - vector.shape[0] + 1
+
+        # 按核函数的每个系数累加平移后的数组
+        conv_result = np.zeros(array.shape[:axis] + (length,) + array.shape[axis + 1:])
+        for i in range(vector.shape[0]):
+            if axis == 0:
+                conv_result += vector[i] * array[i : i + length, :]
+            else:
+                conv_result += vector[i] * array[:, i : i + length]
+
+        return conv_result
+
+    '''
+    @brief 对秩为1的核函数，先横向再纵向各进行一次一维卷积
+    @param expanded_array: 扩展后的数组
+    @param kernel_matrix: 核函数矩阵
+    @return 二维卷积结果
+    '''
+    def convolution_separable (self, expanded_array, kernel_matrix):
+        separated_kernel = self.separate_kernel(kernel_matrix)
+        if separated_kernel is None:
+            raise ValueError("核函数的秩不为1，不能使用可分离卷积")
+
+        column_vector, row_vector = separated_kernel
+        temp_array = self.convolution_1d(expanded_array, row_vector, axis = 1)
+        conv_result = self.convolution_1d(temp_array, column_vector, axis = 0)
+
+        return conv_result
+
     '''
     @brief 均值滤波
     @param none
@@ -143,9 +425,23 @@ class ImgFilter:
     '''
     def img_mean_filter (self):
         self.filter_type = "mean"
-        mean_coef = 1 / (self.kernel_size ** 2)
-        mean_kernel = np.ones((self.kernel_size, self.kernel_size)) * mean_coef  # 获取均值核函数
-        return self.convolution_2d(mean_kernel)
+
+        # 整幅图像处理时，直接从缓存的积分图查表，改变核函数大小不需要重新卷积
+        if self.tile_size is None and self.backend == "auto":
+            return self.get_integral_image().box_mean(self.kernel_size)
+
+        mean_vector = np.ones(self.kernel_size) / self.kernel_size  # 均值核函数是两个一维均值核函数的外积
+        return self.convolution_2d_separable(mean_vector, mean_vector)
+
+    '''
+    @brief 获取原始图像的积分图，只在第一次调用时计算
+    @param none
+    @return 原始图像的IntegralImage对象，可用于计算任意大小窗口的局部均值、方差和标准差
+    '''
+    def get_integral_image (self):
+        if self.integral_image is None:
+            self.integral_image = IntegralImage(self.image_array)
+        return self.integral_image
 
     '''
     @brief 中值滤波
@@ -155,12 +451,96 @@ class ImgFilter:
     def img_median_filter (self):
         self.filter_type = "median"
 
-        # 核函数边缘与核函数中心之间的距离
-        center_to_bound = int((self.kernel_size - 1) / 2)
+        # 分块模式
+        if self.tile_size is not None:
+            return self.tiled_filter(self.median_valid)
 
         # 扩展数组
         expanded_array = self.expand_array()
 
+        return self.median_valid(expanded_array)
+
+    '''
+    @brief 对已经扩展的数组进行中值滤波，结果的大小为扩展前的大小
+    @param expanded_array: 扩展后的数组
+    @return 中值滤波结果
+    '''
+    def median_valid (self, expanded_array):
+        if self.backend == "loop":
+            return self.median_loop(expanded_array)
+
+        # 小核函数直接对窗口部分排序
+        if self.kernel_size <= 5:
+            return self.median_window(expanded_array)
+
+        # 将像素值映射为灰度级序号，8位图像最多256个灰度级
+        levels, level_index = np.unique(expanded_array, return_inverse = True)
+        if levels.shape[0] > 256:
+            return self.median_loop(expanded_array)
+
+        level_array = level_index.reshape(expanded_array.shape)
+        filter_result = levels[self.median_histogram(level_array, levels.shape[0])]
+
+        return np.asarray(filter_result, dtype = np.float64)
+
+    '''
+    @brief 计算每个kernel_size*kernel_size窗口内的元素之和，先纵向再横向使用累加和相减
+    @param array: 输入数组
+    @return 窗口和，大小为输入减去kernel_size - 1
+    '''
+    def window_sum (self, array):
+        vertical_sum = np.cumsum(array, axis = 0, dtype = np.int64)
+        vertical_sum = np.concatenate((np.zeros((1, array.shape[1]), dtype = np.int64), vertical_sum), axis = 0)
+        vertical_sum = vertical_sum[self.kernel_size :, :] - vertical_sum[: -self.kernel_size, :]
+
+        horizontal_sum = np.cumsum(vertical_sum, axis = 1)
+        horizontal_sum = np.concatenate((np.zeros((horizontal_sum.shape[0], 1), dtype = np.int64), horizontal_sum), axis = 1)
+        horizontal_sum = horizontal_sum[:, self.kernel_size :] - horizontal_sum[:, : -self.kernel_size]
+
+        return horizontal_sum
+
+    '''
+    @brief 基于直方图的中值滤波，逐灰度级累加窗口直方图，每个像素的计算量与核函数大小无关
+    @param level_array: 灰度级序号数组（已扩展）
+    @param level_num: 灰度级数量
+    @return 每个像素的中值对应的灰度级序号
+    '''
+    def median_histogram (self, level_array, level_num):
+        median_rank = int((self.kernel_size ** 2 - 1) / 2)  # 中值在排序后的窗口中的位置
+
+        rows = level_array.shape[0] - self.kernel_size + 1
+        columns = level_array.shape[1] - self.kernel_size + 1
+        less_equal_count = np.zeros((rows, columns), dtype = np.int64)  # 窗口内不大于当前灰度级的像素个数
+        median_level = np.zeros((rows, columns), dtype = np.int64)
+
+        # 中值是累计个数首次超过median_rank的灰度级，即累计个数不超过median_rank的灰度级的个数
+        for level in range(level_num - 1):
+            less_equal_count += self.window_sum(level_array == level)
+            median_level += less_equal_count <= median_rank
+
+        return median_level
+
+    '''
+    @brief 使用滑动窗口视图对每个窗口部分排序求中值，适用于小核函数
+    @param expanded_array: 扩展后的数组
+    @return 中值滤波结果
+    '''
+    def median_window (self, expanded_array):
+        median_rank = int((self.kernel_size ** 2 - 1) / 2)
+        windows = sliding_window_view(expanded_array, (self.kernel_size, self.kernel_size))
+        windows = windows.reshape(windows.shape[0], windows.shape[1], self.kernel_size ** 2)
+        filter_result = np.partition(windows, median_rank, axis = -1)[:, :, median_rank]
+        return np.asarray(filter_result, dtype = np.float64)
+
+    '''
+    @brief 逐像素排序求中值
+    @param expanded_array: 扩展后的数组
+    @return 中值滤波结果
+    '''
+    def median_loop (self, expanded_array):
+        # 核函数边缘与核函数中心之间的距离
+        center_to_bound = int((self.kernel_size - 1) / 2)
+
         # 扩展后的数组的行数和列数
         rows = expanded_array.shape[0]
         columns = expanded_array.shape[1]
@@ -178,27 +558,29 @@ class ImgFilter:
         return filter_result
 
     '''
-    @brief 获取高斯滤波的核函数
+    @brief 获取一维高斯核函数，二维高斯核函数是它与自身的外积
     @param std_var: 高斯函数标准差
-    @return 高斯核函数
+    @return 归一化的一维高斯核函数
     '''
-    def create_Gaussian_kernel (self, std_var):
-        # 初始化高斯核函数
-        gaussian_kernel = np.zeros((self.kernel_size, self.kernel_size))
-
+    def create_Gaussian_vector (self, std_var):
         # 计算核函数中心点
-        cx = int((self.kernel_size - 1) / 2)
-        cy = cx
+        center = int((self.kernel_size - 1) / 2)
 
-        # 计算高斯核函数
-        for i in range(self.kernel_size):
-            for j in range(self.kernel_size):
-                x = i - cx
-                y = j - cy
-                gaussian_kernel[i, j] = (1 / (2 * np.pi * std_var ** 2)) * np.exp(-(x ** 2 + y ** 2) / (2 * std_var ** 2))
-        
-        gaussian_kernel = gaussian_kernel / np.sum(gaussian_kernel)
+        # 计算一维高斯核函数并归一化
+        x = np.arange(self.kernel_size) - center
+        gaussian_vector = np.exp(-(x ** 2) / (2 * std_var ** 2))
+        gaussian_vector = gaussian_vector / np.sum(gaussian_vector)
+
+        return gaussian_vector
 
+    '''
+    @brief 获取高斯滤波的核函数
+    @param std_var: 高斯函数标准差
+    @return 高斯核函数
+    '''
+    def create_Gaussian_kernel (self, std_var):
+        gaussian_vector = self.create_Gaussian_vector(std_var)
+        gaussian_kernel = np.outer(gaussian_vector, gaussian_vector)  # 两个归一化的一维核函数的外积仍是归一化的
         return gaussian_kernel
 
     '''
@@ -208,29 +590,44 @@ class ImgFilter:
     '''
     def img_Gaussian_filter (self, std_var):
         self.filter_type = "Gaussian"
-        gaussian_kernel = self.create_Gaussian_kernel(std_var)  # 获取高斯核函数
-        return self.convolution_2d(gaussian_kernel)
+        gaussian_vector = self.create_Gaussian_vector(std_var)  # 获取一维高斯核函数
+        return self.convolution_2d_separable(gaussian_vector, gaussian_vector)
 
     '''
-    @brief 获取Sobel核函数
+    @brief 获取Sobel核函数分解得到的一维核函数
     @param none
-    @return x方向和y方向的Sobel核函数
+    @return smooth_vector: 平滑方向的一维核函数（二项式系数）
+    @return diff_vector: 求导方向的一维核函数
     '''
-    def create_Sobel_kernel (self):
+    def create_Sobel_vector (self):
         n = self.kernel_size - 1
-        sobel_kernel_x = np.zeros((self.kernel_size, self.kernel_size))
+        center = int((self.kernel_size - 1) / 2)
 
         # 计算组合数
-        temp_array = np.zeros(self.kernel_size)
+        smooth_vector = np.zeros(self.kernel_size)
         for i in range(self.kernel_size):
-            temp_array[i] = math.comb(n, i)
+            smooth_vector[i] = math.comb(n, i)
 
-        # 计算x方向的Sobel核函数
+        # 计算求导系数，中心两侧分别为负数和正数
+        diff_vector = np.zeros(self.kernel_size)
         for i in range(self.kernel_size):
-            if i < int((self.kernel_size - 1) / 2):
-                sobel_kernel_x[:, i] = -(i + 1) * temp_array
-            elif i > int((self.kernel_size - 1) / 2):
-                sobel_kernel_x[:, i] = (self.kernel_size - i) * temp_array
+            if i < center:
+                diff_vector[i] = -(i + 1)
+            elif i > center:
+                diff_vector[i] = self.kernel_size - i
+
+        return smooth_vector, diff_vector
+
+    '''
+    @brief 获取Sobel核函数
+    @param none
+    @return x方向和y方向的Sobel核函数
+    '''
+    def create_Sobel_kernel (self):
+        smooth_vector, diff_vector = self.create_Sobel_vector()
+
+        # x方向的Sobel核函数每一列是平滑系数乘上该列的求导系数
+        sobel_kernel_x = np.outer(smooth_vector, diff_vector)
 
         # y方向的Sobel核函数是x方向的核函数的转置
         sobel_kernel_y = sobel_kernel_x.T
@@ -244,9 +641,9 @@ class ImgFilter:
     '''
     def img_Sobel_filter (self):
         self.filter_type = "Sobel"
-        sobel_kernel_x, sobel_kernel_y = self.create_Sobel_kernel()  # 获取核函数
-        grad_x = self.convolution_2d(sobel_kernel_x)
-        grad_y = self.convolution_2d(sobel_kernel_y)
+        smooth_vector, diff_vector = self.create_Sobel_vector()  # 获取一维核函数
+        grad_x = self.convolution_2d_separable(smooth_vector, diff_vector)  # 纵向平滑，横向求导
+        grad_y = self.convolution_2d_separable(diff_vector, smooth_vector)  # 纵向求导，横向平滑
         sobel_result = (abs(grad_x) + abs(grad_y)) / np.max(abs(grad_x) + abs(grad_y)) * 255  # 使用相加而不是平方和开根号，从而减少运算
         sobel_result = np.uint8(sobel_result)
         return sobel_result
@@ -349,10 +746,12 @@ def gaussian_filter_image ():
     root.wait_variable(bool_var)
     bool_var.set(False)  # 复位bool_var
 
-    filter_image_array = img_filter.img_Gaussian_filter(std_var)
+    background_worker.cancel("filter")  # 丢弃还没有显示的滑动条结果
+    kernel_size_scale.config(to = 45)
+    sync_kernel_size()
+    filter_image_array = get_filter_result("Gaussian")
 
     # 显示滑动条
-    kernel_size_scale.config(to = 45)
     min_scale_label.config(text = f"{kernel_size_scale.cget("from")}")
     max_scale_label.config(text = f"{kernel_size_scale.cget("to")}")
     scale_frame.grid(row = 3, column = 1)
@@ -362,14 +761,15 @@ def gaussian_filter_image ():
     filter_image_tip.config(text = f"{img_filter.filter_type}滤波后的图像，核函数大小为{img_filter.kernel_size}")
 
 def highpass_filter_image (filter_type):
+    background_worker.cancel("filter")  # 丢弃还没有显示的滑动条结果
     reset_kernel_size_scale()
+    kernel_size_scale.config(to = 11)
+    sync_kernel_size()
 
     if filter_type == "Sobel":
-        filter_image_array = img_filter.img_Sobel_filter()
-        kernel_size_scale.config(to = 11)
+        filter_image_array = get_filter_result("Sobel")
     elif filter_type == "Laplace":
-        filter_image_array = img_filter.img_Laplace_filter()
-        kernel_size_scale.config(to = 11)
+        filter_image_array = get_filter_result("Laplace")
 
     # 显示滑动条
     min_scale_label.config(text = f"{kernel_size_scale.cget("from")}")
@@ -380,23 +780,58 @@ def highpass_filter_image (filter_type):
     show_filter_image(filter_image_array)
     filter_image_tip.config(text = f"{img_filter.filter_type}滤波后的图像，核函数大小为{img_filter.kernel_size}")
 
+'''
+@brief 获取滤波结果，图像和参数都相同时直接从缓存中取出
+@param filter_str: 滤波器类型
+@param image_filter: 进行滤波的ImgFilter对象，为None时使用img_filter
+@param key: 图像的缓存键，为None时使用image_key
+@return 滤波结果
+'''
+def get_filter_result (filter_str, image_filter = None, key = None):
+    if image_filter is None:
+        image_filter = img_filter
+    if key is None:
+        key = image_key
+
+    # 各滤波器的计算函数和参数
+    if filter_str == "mean":
+        compute, params = image_filter.img_mean_filter, (image_filter.kernel_size,)
+    elif filter_str == "median":
+        compute, params = image_filter.img_median_filter, (image_filter.kernel_size,)
+    elif filter_str == "Gaussian":
+        gaussian_std_var = std_var  # 只读取一次，计算和缓存的参数一致
+        compute, params = lambda: image_filter.img_Gaussian_filter(gaussian_std_var), (image_filter.kernel_size, gaussian_std_var)
+    elif filter_str == "Sobel":
+        compute, params = image_filter.img_Sobel_filter, (image_filter.kernel_size,)
+    elif filter_str == "Laplace":
+        compute, params = image_filter.img_Laplace_filter, (image_filter.kernel_size,)
+
+    filter_image_array = result_cache.get_or_compute(key, filter_str, params, compute)
+    image_filter.filter_type = filter_str  # 命中缓存时不会调用滤波函数，需要手动设置滤波器类型
+
+    return filter_image_array
+
 def filter_image (filter_str):
+    background_worker.cancel("filter")  # 丢弃还没有显示的滑动条结果
+
+    # 先设置滑动条范围，超出范围的值会被限制在范围内，再按滑动条当前的值计算
+    if filter_str in ("Sobel", "Laplace"):
+        kernel_size_scale.config(to = 11)
+    else:
+        kernel_size_scale.config(to = 45)
+    sync_kernel_size()
+
     # 判断是哪种滤波器
     if filter_str == "mean":
-        filter_image_array = img_filter.img_mean_filter()
-        kernel_size_scale.config(to = 45)
+        filter_image_array = get_filter_result("mean")
     elif filter_str == "median":
-        filter_image_array = img_filter.img_median_filter()
-        kernel_size_scale.config(to = 45)
+        filter_image_array = get_filter_result("median")
     elif filter_str == "Gaussian":
-        filter_image_array = img_filter.img_Gaussian_filter(std_var)
-        kernel_size_scale.config(to = 45)
+        filter_image_array = get_filter_result("Gaussian")
     elif filter_str == "Sobel":
-        filter_image_array = img_filter.img_Sobel_filter()
-        kernel_size_scale.config(to = 11)
+        filter_image_array = get_filter_result("Sobel")
     elif filter_str == "Laplace":
-        filter_image_array = img_filter.img_Laplace_filter()
-        kernel_size_scale.config(to = 11)
+        filter_image_array = get_filter_result("Laplace")
 
     # 显示滑动条
     min_scale_label.config(text = f"{kernel_size_scale.cget("from")}")
@@ -408,7 +843,7 @@ def filter_image (filter_str):
     filter_image_tip.config(text = f"{img_filter.filter_type}滤波后的图像，核函数大小为{img_filter.kernel_size}")
 
 def file_operation ():
-    global origin_image_tk, img_filter
+    global origin_image_tk, img_filter, image_key
 
     # 获取文件路径
     file_path = fd.askopenfilename()
@@ -434,6 +869,8 @@ def file_operation ():
 
     # 创建图像滤波器类对象
     img_filter = ImgFilter(kernel_size = init_kernel_size, image_array = image_array)
+    image_key = result_cache.array_key(image_array)  # 图像内容的哈希，作为缓存的键
+    background_worker.cancel("filter")  # 丢弃上一幅图像还没有显示的结果
 
     # 转换为tkinter能解析的PhotoImage对象   
     origin_image_tk = ImageTk.PhotoImage(image)
@@ -450,6 +887,9 @@ if __name__ == '__main__':
     # 初始核函数大小
     init_kernel_size = 3
 
+    # 滤波结果缓存
+    result_cache = ResultCache(max_bytes = 256 * 1024 * 1024)
+
     # 创建基本界面
     root = tk.Tk()
     root.title("数字图像处理实验七：滤波器设计")  # 设置界面标题
@@ -513,7 +953,11 @@ if __name__ == '__main__':
     min_scale_label.grid(row = 0, column = 0)
     max_scale_label = ttk.Label(scale_frame)
     max_scale_label.grid(row = 0, column = 2)
+    busy_label = ttk.Label(scale_frame)  # 后台计算时显示提示
+    busy_label.grid(row = 0, column = 3)
 
+    # 滑动条触发的计算在后台线程中进行
+    background_worker = BackgroundWorker(root, busy_label = busy_label)
 
     # 创建图像标签
     origin_image_label = ttk.Label(frame)
@@ -0,0 +1,112 @@
+import numpy as np
+
+class IntegralImage:
+    '''
+    @brief 初始化，计算一次积分图（累加和表），之后任意大小的窗口都可以直接查表
+    @param image_array: 二维图像数组
+    '''
+    def __init__ (self, image_array):
+        self.rows = image_array.shape[0]  # 图像行数
+        self.columns = image_array.shape[1]  # 图像列数
+
+        # 整数图像使用整数累加，结果没有舍入误差
+        if np.issubdtype(image_array.dtype, np.integer):
+            self.dtype = np.int64
+        else:
+            self.dtype = np.float64
+
+        self.image_array = image_array  # 原始图像数组，计算平方和积分图时使用
+        self.sum_table = self.create_table(image_array)  # 像素值的积分图
+        self.square_sum_table = None  # 像素值平方的积分图，需要时再计算
+
+    '''
+    @brief 计算积分图，第一行和第一列补零，table[i, j]为图像前i行、前j列的元素之和
+    @param array: 二维数组
+    @return table: 积分图
+    '''
+    def create_table (self, array):
+        table = np.zeros((self.rows + 1, self.columns + 1), dtype = self.dtype)
+        np.cumsum(array, axis = 0, dtype = self.dtype, out = table[1:, 1:])
+        np.cumsum(table[1:, 1:], axis = 1, out = table[1:, 1:])
+        return table
+
+    '''
+    @brief 计算周期延拓后的图像在给定位置的前缀和，与ImgFilter.expand_array的循环填充方式一致
+    @param table: 积分图
+    @param row_index: 行位置数组，可以为负数或超过图像行数
+    @param column_index: 列位置数组，可以为负数或超过图像列数
+    @return 每个(row_index[i], column_index[j])处的前缀和
+    '''
+    def periodic_prefix_sum (self, table, row_index, column_index):
+        # 位置拆分为完整周期数和余数
+        row_period, row_rest = np.divmod(row_index, self.rows)
+        column_period, column_rest = np.divmod(column_index, self.columns)
+
+        row_period = row_period[:, np.newaxis]
+        column_period = column_period[np.newaxis, :]
+
+        # 完整周期部分直接由整行、整列或整幅图像的和得到
+        prefix_sum = row_period * column_period * table[self.rows, self.columns]
+        prefix_sum = prefix_sum + row_period * table[self.rows, column_rest][np.newaxis, :]
+        prefix_sum = prefix_sum + column_period * table[row_rest, self.columns][:, np.newaxis]
+        prefix_sum = prefix_sum + table[np.ix_(row_rest, column_rest)]
+
+        return prefix_sum
+
+    '''
+    @brief 计算以每个像素为中心的窗口内的元素之和
+    @param kernel_size: 窗口大小
+    @param table: 积分图，为None时使用像素值的积分图
+    @return 窗口和数组，大小与图像相同
+    '''
+    def box_sum (self, kernel_size, table = None):
+        if table is None:
+            table = self.sum_table
+
+        center_to_bound = int((kernel_size - 1) / 2)
+
+        # 窗口的上下左右边界
+        row_start = np.arange(self.rows) - center_to_bound
+        row_stop = row_start + kernel_size
+        column_start = np.arange(self.columns) - center_to_bound
+        column_stop = column_start + kernel_size
+
+        # 四个角的前缀和相减得到窗口和
+        window_sum = self.periodic_prefix_sum(table, row_stop, column_stop) \
+                     - self.periodic_prefix_sum(table, row_start, column_stop) \
+                     - self.periodic_prefix_sum(table, row_stop, column_start) \
+                     + self.periodic_prefix_sum(table, row_start, column_start)
+
+        return window_sum
+
+    '''
+    @brief 计算局部均值
+    @param kernel_size: 窗口大小
+    @return 局部均值数组
+    '''
+    def box_mean (self, kernel_size):
+        return self.box_sum(kernel_size) / (kernel_size ** 2)
+
+    '''
+    @brief 计算局部方差
+    @param kernel_size: 窗口大小
+    @return 局部方差数组
+    '''
+    def local_variance (self, kernel_size):
+        # 平方和的积分图只在第一次需要时计算
+        if self.square_sum_table is None:
+            self.square_sum_table = self.create_table(np.square(self.image_array, dtype = self.dtype))
+
+        mean = self.box_mean(kernel_size)
+        square_mean = self.box_sum(kernel_size, self.square_sum_table) / (kernel_size ** 2)
+        variance = np.maximum(square_mean - mean ** 2, 0)  # 防止舍入误差产生负数
+
+        return variance
+
+    '''
+    @brief 计算局部标准差
+    @param kernel_size: 窗口大小
+    @return 局部标准差数组
+    '''
+    def local_std (self, kernel_size):
+        return np.sqrt(self.local_variance(kernel_size))
@@ -8,17 +8,24 @@ from matplotlib import pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from matplotlib.figure import Figure
 import struct
+import os
 import math
+from image_loader import load_image_array, get_load_info
+from warp_map import WarpMap
+from result_cache import ResultCache
+
+warp_map_cache = ResultCache()  # 所有GeometryTransform共享的坐标映射缓存，超出内存预算时淘汰最久未使用的映射
+pyramid_cache = ResultCache()  # 所有GeometryTransform共享的图像金字塔缓存，超出内存预算时淘汰最久未使用的金字塔
 
 '''
-@brief 获取灰度图像数据
+@brief 获取图像数据
 @param image: PIL的Image类
-@return image_array: 图像对应的二维数组
+@return image_array: 图像对应的数组，灰度图像为H*W，彩色图像为H*W*C
 '''
 def get_image_array (image):
-    (width, height) = image.size  # 获取图像的宽和高
-    image_array = np.array(image.getdata())  # 获取图像的像素数据并转化为数组
-    image_array = image_array.reshape((height, width))
+    # 调色板等其他模式先转换为RGB，保证数组的值就是像素值
+    mode = None if image.mode in ("L", "RGB", "RGBA") else "RGB"
+    image_array = load_image_array(image, mode)  # 获取uint8的图像数组，通道在最后一维
     return image_array
 
 '''
@@ -35,25 +42,91 @@ def show_image (image_array):
     # 显示转换后的图片
     transformed_image_label.config(image = transformed_image_tk)
 
-''' 
-@brief 读取raw文件
+'''
+@brief 读取raw文件，以只读的方式将像素数据映射到内存，不会为每个像素创建Python对象
 @param file_name: raw文件路径
-@return raw_array: raw文件图像数组
+@param row_range: 需要读取的行范围(起始行, 结束行)，不包含结束行，为None时读取整幅图像
+@return raw_array: raw文件图像数组，为只读的uint8内存映射数组
 '''
-def read_raw (file_name):
-    # 获取raw文件表示的图片的数据
+def read_raw (file_name, row_range = None):
+    # 读取文件头，文件头为图片的宽度和高度，各占4个字节
     raw_file = open(file_name, "rb")  # 打开文件，以只读、二进制的方式打开
-    raw_width = struct.unpack("i", raw_file.read(4))[0]  # 获取raw文件表示的图片的宽度
-    raw_height = struct.unpack("i", raw_file.read(4))[0]  # 获取raw文件表示的图片的高度
-    raw_data = struct.unpack(f"{raw_width * raw_height}B", raw_file.read())  # 获取raw文件表示的图片的数组
+    header = raw_file.read(8)
     raw_file.close()  # 关闭文件
+    if len(header) < 8:
+        raise ValueError(f"{file_name}不是有效的raw文件：文件头不完整")
+    raw_width, raw_height = struct.unpack("ii", header)  # 获取raw文件表示的图片的宽度和高度
+
+    # 检查文件头与文件大小是否一致
+    if raw_width <= 0 or raw_height <= 0:
+        raise ValueError(f"{file_name}不是有效的raw文件：宽度为{raw_width}，高度为{raw_height}")
+    if os.path.getsize(file_name) != 8 + raw_width * raw_height:
+        raise ValueError(f"{file_name}不是有效的raw文件：文件大小与{raw_width}*{raw_height}的图像不符")
+
+    # 计算需要映射的行范围
+    if row_range is None:
+        row_start, row_stop = 0, raw_height
+    else:
+        row_start, row_stop, _ = slice(*row_range).indices(raw_height)
+    if row_stop <= row_start:
+        raise ValueError(f"行范围{row_range}超出了图像的高度{raw_height}")
 
-    # 将获取到的数组转换为二维数组
-    raw_array = np.array(raw_data).reshape((raw_height, raw_width))
+    # 只映射需要的行，像素数据直接作为uint8数组使用
+    raw_array = np.memmap(file_name, dtype = np.uint8, mode = "r",
+                          offset = 8 + row_start * raw_width,
+                          shape = (row_stop - row_start, raw_width))
 
     return raw_array
 
+'''
+@brief 双线性插值核（三角核）
+@param distance: 采样点到插值位置的距离
+@return 采样点的权重
+'''
+def linear_kernel (distance):
+    return np.maximum(1 - np.abs(distance), 0)
+
+'''
+@brief 双三次插值核（Keys三次卷积核，a = -0.5）
+@param distance: 采样点到插值位置的距离
+@return 采样点的权重
+'''
+def cubic_kernel (distance):
+    a = -0.5
+    distance = np.abs(distance)
+    near = ((a + 2) * distance - (a + 3)) * distance * distance + 1
+    far = ((a * distance - 5 * a) * distance + 8 * a) * distance - 4 * a
+    return np.where(distance <= 1, near, np.where(distance < 2, far, 0))
+
+'''
+@brief Lanczos-3插值核
+@param distance: 采样点到插值位置的距离
+@return 采样点的权重
+'''
+def lanczos3_kernel (distance):
+    return np.where(np.abs(distance) < 3, np.sinc(distance) * np.sinc(distance / 3), 0)
+
 class Interpolation:
+    '''
+    @brief 初始化，注册可用的可分离插值核
+    '''
+    def __init__ (self):
+        # 插值核名称 -> (支撑半径, 插值核函数)，每个方向的采样点数为支撑半径的两倍
+        self.kernels = {
+            "bilinear": (1, linear_kernel),
+            "bicubic": (2, cubic_kernel),
+            "lanczos3": (3, lanczos3_kernel),
+        }
+
+    '''
+    @brief 注册新的插值核
+    @param name: 插值核名称
+    @param radius: 插值核的支撑半径
+    @param kernel: 插值核函数，输入采样点到插值位置的距离数组，输出权重数组
+    '''
+    def register_kernel (self, name, radius, kernel):
+        self.kernels[name] = (radius, kernel)
+
     '''
     @brief 线性插值
     @param x1: 插值范围的下界
@@ -107,14 +180,93 @@ class Interpolation:
         result = coef * (vector1 @ matrix @ vector2)  # 使用@符号进行矩阵运算
         return result[0]
 
+    '''
+    @brief 获取插值方法在一个方向上的采样点数
+    @param method: 插值方法，"nearest"或已注册的插值核名称
+    @return 采样点数
+    '''
+    def get_tap_count (self, method = "bilinear"):
+        if method == "nearest":
+            return 1
+        if method not in self.kernels:
+            raise ValueError(f"unknown interpolation method: {method}")
+        return 2 * self.kernels[method][0]
+
+    '''
+    @brief 计算一组采样位置在一个方向上的采样点和插值权重
+    @param position: 采样位置数组
+    @param length: 图像在该方向上的长度，超出范围的采样点取边界像素
+    @param method: 插值方法，"nearest"或已注册的插值核名称（"bilinear"、"bicubic"、"lanczos3"）
+    @return indices: 采样点下标，形状为(采样点数,) + position.shape
+    @return weights: 采样点权重，形状与indices相同
+    '''
+    def get_taps (self, position, length, method = "bilinear"):
+        position = np.asarray(position, dtype = np.float64)
+        if method == "nearest":
+            indices = np.clip(np.floor(position + 0.5), 0, length - 1).astype(np.intp)[None]
+            weights = np.ones_like(indices, dtype = np.float64)
+            return indices, weights
+        if method not in self.kernels:
+            raise ValueError(f"unknown interpolation method: {method}")
+
+        # 插值位置左右各radius个采样点
+        radius, kernel = self.kernels[method]
+        offsets = np.arange(1 - radius, radius + 1).reshape((-1,) + (1,) * position.ndim)
+        indices = np.floor(position).astype(np.intp)[None] + offsets
+        weights = kernel(position[None] - indices)
+        weights = weights / np.sum(weights, axis = 0)  # 归一化，保证平坦区域插值后不变
+
+        indices = np.clip(indices, 0, length - 1)  # 超出图像的采样点取边界像素
+        return indices, weights
+
+    '''
+    @brief 计算区域平均（盒式）缩小时每个输出像素覆盖的源像素和权重
+    @param length_new: 缩小后在该方向上的长度
+    @param length: 原图像在该方向上的长度
+    @param zoom_out_coef: 缩小倍数
+    @return indices: 源像素下标，形状为(采样点数, length_new)
+    @return weights: 源像素被覆盖的面积占比，形状与indices相同
+    '''
+    def get_area_taps (self, length_new, length, zoom_out_coef):
+        # 第i个输出像素覆盖源图像的区间[start, stop)
+        start = np.arange(length_new) * zoom_out_coef
+        stop = np.minimum(start + zoom_out_coef, length)
+        taps = int(math.ceil(zoom_out_coef)) + 1
+
+        # 与区间相交的源像素及相交长度
+        indices = np.floor(start).astype(np.intp)[None, :] + np.arange(taps)[:, None]
+        overlap = np.minimum(stop[None, :], indices + 1) - np.maximum(start[None, :], indices)
+        weights = np.maximum(overlap, 0) / (stop - start)[None, :]
+        indices = np.minimum(indices, length - 1)  # 超出图像的采样点权重为0，下标取边界即可
+        return indices, weights
+
+    '''
+    @brief 沿一个方向对整个数组进行插值，所有行（列）在一次取值和加权中完成
+    @param array: 需要插值的数组
+    @param indices: 采样点下标，形状为(采样点数, 输出长度)
+    @param weights: 采样点权重，形状与indices相同
+    @param axis: 插值的方向
+    @return result: 插值结果，为float64数组
+    '''
+    def resample_axis (self, array, indices, weights, axis):
+        shape = [1] * array.ndim
+        shape[axis] = -1
+        result = weights[0].reshape(shape) * np.take(array, indices[0], axis = axis)
+        for i in range(1, len(indices)):
+            result += weights[i].reshape(shape) * np.take(array, indices[i], axis = axis)
+        return result
+
 class GeometryTransform:
     '''
     @brief 初始化
     @param image_array: 需要进行变换的图像的数组
     '''
-    def __init__ (self, image_array, interpolation):
+    def __init__ (self, image_array, interpolation, warp_map_cache = warp_map_cache, pyramid_cache = pyramid_cache):
         self.origin_image_array = image_array  # 原图像数组
         self.interpolation_method = interpolation  # 插值方法
+        self.warp_map_cache = warp_map_cache  # 坐标映射缓存
+        self.pyramid_cache = pyramid_cache  # 图像金字塔缓存
+        self.image_key = None  # 原图像内容的键，第一次使用金字塔时计算
 
     '''
     @brief 计算正弦函数值
@@ -132,20 +284,179 @@ class GeometryTransform:
     def cos (self, angle):
         return math.cos(math.radians(angle))
 
+    '''
+    @brief 获取平移变换矩阵，变换矩阵作用在齐次坐标(行, 列, 1)上，把原图像坐标映射到变换后的坐标
+    @param x_length: 在横轴方向（列）上平移的长度
+    @param y_length: 在纵轴方向（行）上平移的长度
+    @return 3*3的变换矩阵
+    '''
+    def get_translate_matrix (self, x_length, y_length):
+        return np.array([[1, 0, y_length], [0, 1, x_length], [0, 0, 1]], dtype = np.float64)
+
+    '''
+    @brief 获取绕原点旋转的变换矩阵
+    @param angle: 旋转的角度，使用角度制，正数表示逆时针旋转，负数表示顺时针旋转
+    @return 3*3的变换矩阵
+    '''
+    def get_rotate_matrix (self, angle):
+        sin_angle = self.sin(angle)
+        cos_angle = self.cos(angle)
+        return np.array([[cos_angle, -sin_angle, 0], [sin_angle, cos_angle, 0], [0, 0, 1]], dtype = np.float64)
+
+    '''
+    @brief 获取以原点为中心缩放的变换矩阵
+    @param zoom_coef: 缩放倍数，大于一为放大，小于一为缩小
+    @return 3*3的变换矩阵
+    '''
+    def get_zoom_matrix (self, zoom_coef):
+        return np.array([[zoom_coef, 0, 0], [0, zoom_coef, 0], [0, 0, 1]], dtype = np.float64)
+
+    '''
+    @brief 按先后顺序复合多个变换，复合后只需要对图像重采样一次
+    @param matrices: 依次作用的变换矩阵
+    @return matrix: 复合后的变换矩阵
+    '''
+    def compose (self, *matrices):
+        matrix = np.eye(3)
+        for m in matrices:
+            matrix = m @ matrix
+        return matrix
+
+    '''
+    @brief 平移变换矩阵，使整幅原图像变换后都落在输出图像内
+    @param matrix: 变换矩阵
+    @return matrix: 平移后的变换矩阵
+    @return output_shape: 能容纳变换后图像的输出图像的行数和列数
+    '''
+    def fit_output (self, matrix):
+        rows = self.origin_image_array.shape[0]
+        columns = self.origin_image_array.shape[1]
+
+        # 原图像四个角点变换后的坐标
+        corners = np.array([[0, 0, rows, rows], [0, columns, 0, columns], [1, 1, 1, 1]], dtype = np.float64)
+        corners = matrix @ corners
+        corners = corners[:2] / corners[2]
+
+        low = corners.min(axis = 1)
+        high = corners.max(axis = 1)
+        output_shape = tuple(int(math.ceil(size)) for size in high - low)
+        matrix = self.get_translate_matrix(-low[1], -low[0]) @ matrix
+        return matrix, output_shape
+
+    '''
+    @brief 计算输出图像部分行的坐标映射
+    @param matrix: 变换矩阵
+    @param output_shape: 输出图像的行数和列数
+    @param interpolation: 插值方法
+    @param row_start: 起始行
+    @param row_stop: 结束行，不包含结束行
+    @return warp_map: 这些行的坐标映射
+    '''
+    def get_warp_map (self, matrix, output_shape, interpolation, row_start, row_stop):
+        rows = self.origin_image_array.shape[0]
+        columns = self.origin_image_array.shape[1]
+
+        # 逆映射：由输出像素坐标计算原图像坐标
+        inverse = np.linalg.inv(matrix)
+        x = np.arange(row_start, row_stop, dtype = np.float64)[:, None]
+        y = np.arange(output_shape[1], dtype = np.float64)[None, :]
+        w = inverse[2, 0] * x + inverse[2, 1] * y + inverse[2, 2]
+        x_src = (inverse[0, 0] * x + inverse[0, 1] * y + inverse[0, 2]) / w
+        y_src = (inverse[1, 0] * x + inverse[1, 1] * y + inverse[1, 2]) / w
+
+        # 不属于原图像的部分权重为0，留出一点余量避免矩阵求逆的舍入误差使边界像素被丢弃
+        eps = 1e-6
+        inside = (x_src >= -eps) & (x_src <= rows - 1 + eps) & (y_src >= -eps) & (y_src <= columns - 1 + eps)
+
+        # 两个方向的采样点组合成二维的采样点
+        x_indices, x_weights = self.interpolation_method.get_taps(x_src, rows, interpolation)
+        y_indices, y_weights = self.interpolation_method.get_taps(y_src, columns, interpolation)
+        indices = (x_indices[:, None] * columns + y_indices[None, :]).reshape(-1, x_src.size)
+        weights = (x_weights[:, None] * y_weights[None, :] * inside).reshape(-1, x_src.size)
+
+        return WarpMap(indices, weights, (row_stop - row_start, output_shape[1]))
+
+    '''
+    @brief 从缓存中获取输出图像部分行的坐标映射，缓存中没有时计算并存入
+    @param matrix: 变换矩阵
+    @param output_shape: 输出图像的行数和列数
+    @param interpolation: 插值方法
+    @param row_start: 起始行
+    @param row_stop: 结束行，不包含结束行
+    @param index_dtype: 缓存的下标数组的数据类型
+    @return warp_map: 这些行的坐标映射，权重为float32
+    '''
+    def get_cached_warp_map (self, matrix, output_shape, interpolation, row_start, row_stop, index_dtype):
+        # 缓存时压缩为较小的数据类型，映射只与原图像的行数和列数有关，与通道数无关
+        def build ():
+            warp_map = self.get_warp_map(matrix, output_shape, interpolation, row_start, row_stop)
+            return warp_map.indices.astype(index_dtype), warp_map.weights.astype(np.float32)
+
+        params = (matrix.tobytes(), output_shape, interpolation, row_start, row_stop)
+        indices, weights = self.warp_map_cache.get_or_compute(self.origin_image_array.shape[:2], "warp", params, build)
+        return WarpMap(indices, weights, (row_stop - row_start, output_shape[1]))
+
+    '''
+    @brief 对图像进行仿射或射影变换
+    @param matrix: 3*3的变换矩阵，把原图像坐标映射到输出图像坐标
+    @param output_shape: 输出图像的行数和列数
+    @param interpolation: 插值方法
+    @param block_rows: 每次计算的输出图像行数，用于限制临时数组占用的内存，缓存的映射也按这个行数分块
+    @param cache: 是否缓存坐标映射，批量处理同样大小的图像时可以复用，整幅图像的映射超出缓存预算时不缓存
+    @return warp_image_array: 变换后的图像数组，数据类型与原图像相同
+    '''
+    def warp (self, matrix, output_shape, interpolation = "bilinear", block_rows = 256, cache = False):
+        matrix = np.asarray(matrix, dtype = np.float64)
+        output_shape = tuple(output_shape)
+
+        # 整幅图像的映射放不进缓存时，缓存只会不断淘汰，直接分块计算
+        if cache:
+            pixels = self.origin_image_array.shape[0] * self.origin_image_array.shape[1]
+            index_dtype = np.int32 if pixels <= np.iinfo(np.int32).max else np.intp
+            taps = self.interpolation_method.get_tap_count(interpolation) ** 2
+            map_bytes = taps * output_shape[0] * output_shape[1] * (np.dtype(index_dtype).itemsize + np.dtype(np.float32).itemsize)
+            cache = map_bytes <= self.warp_map_cache.max_bytes
+
+        # 按行分块计算映射并插值，每块插值后立即转换为原图像的数据类型，不保留整幅图像的浮点结果
+        warp_image_array = np.empty(output_shape + self.origin_image_array.shape[2:], dtype = self.origin_image_array.dtype)
+        for row_start in range(0, output_shape[0], block_rows):
+            row_stop = min(row_start + block_rows, output_shape[0])
+            if cache:
+                warp_map = self.get_cached_warp_map(matrix, output_shape, interpolation, row_start, row_stop, index_dtype)
+            else:
+                warp_map = self.get_warp_map(matrix, output_shape, interpolation, row_start, row_stop)
+            warp_image_array[row_start : row_stop] = self.to_input_dtype(warp_map.apply(self.origin_image_array))
+
+        return warp_image_array
+
+    '''
+    @brief 将插值结果转换为原图像的数据类型，整数类型先四舍五入并限制在取值范围内
+    @param array: 插值结果
+    @return 与原图像数据类型相同的数组
+    '''
+    def to_input_dtype (self, array):
+        dtype = self.origin_image_array.dtype
+        if np.issubdtype(dtype, np.integer):
+            info = np.iinfo(dtype)
+            array = np.clip(np.rint(array), info.min, info.max)
+        return array.astype(dtype)
+
     '''
     @brief 图像绕其中心逆时针旋转90度
     @return transpose_image_array: 转置后的图像数组
     '''
     def image_transpose (self):
-        transpose_image_array = self.origin_image_array.T
+        transpose_image_array = np.ascontiguousarray(self.origin_image_array.swapaxes(0, 1))  # 只交换行和列，通道保持在最后一维
         return transpose_image_array
 
     '''
     @brief 图像绕其中心旋转
     @param angle: 旋转的角度，使用角度制，正数表示逆时针旋转，负数表示顺时针旋转
+    @param block_rows: 每次计算的输出图像行数，用于限制临时数组占用的内存
+    @param interpolation: 插值方法，"nearest"、"bilinear"、"bicubic"或"lanczos3"
     @return rotate_image_array: 旋转后的图像数组
     '''
-    def image_rotate (self, angle):
+    def image_rotate (self, angle, block_rows = 256, interpolation = "bilinear"):
         # 获取原始图像的行数和列数
         rows = self.origin_image_array.shape[0]
         columns = self.origin_image_array.shape[1]
@@ -154,38 +465,12 @@ class GeometryTransform:
         rows_new = math.ceil(abs(rows * self.cos(angle)) + abs(columns * self.sin(angle)))
         columns_new = math.ceil(abs(rows * self.sin(angle)) + abs(columns * self.cos(angle)))
 
-        # 原始中心点
-        center_x = rows / 2
-        center_y = columns / 2
+        # 原图像中心平移到原点，旋转后再平移到新图像的中心
+        matrix = self.compose(self.get_translate_matrix(-columns / 2, -rows / 2),
+                              self.get_rotate_matrix(angle),
+                              self.get_translate_matrix(columns_new / 2, rows_new / 2))
 
-        # 变换后的中心点
-        center_x_new = rows_new / 2
-        center_y_new = columns_new / 2
-
-        # 预先计算旋转角的正弦值和余弦值
-        sin_angle = self.sin(angle)
-        cos_angle = self.cos(angle)
-
-        rotate_image_array = np.zeros((rows_new, columns_new))
-
-        # 旋转变换
-        for x in range(rows_new):
-            for y in range(columns_new):
-                x_src = x * cos_angle + y * sin_angle - center_x_new * cos_angle - center_y_new * sin_angle + center_x
-                y_src = -x * sin_angle + y * cos_angle + center_x_new * sin_angle - center_y_new * cos_angle + center_y
-                if x_src < 0 or x_src > rows - 1 or y_src < 0 or y_src > columns - 1:  # 不属于原图像的部分
-                    rotate_image_array[x, y] = 0
-                else:  # 正常情况
-                    x1 = int(x_src)
-                    x2 = math.ceil(x_src)
-                    y1 = int(y_src)
-                    y2 = math.ceil(y_src)
-                    rotate_image_array[x, y] = self.interpolation_method.bilinear_interpolation(x1, y1, x2, y2, 
-                                                                                                self.origin_image_array[x1, y1], self.origin_image_array[x1, y2], 
-                                                                                                self.origin_image_array[x2, y1], self.origin_image_array[x2, y2], 
-                                                                                                x_src, y_src)
-                
-        return rotate_image_array
+        return self.warp(matrix, (rows_new, columns_new), interpolation, block_rows = block_rows)
 
     '''
     @brief 图像平移
@@ -198,33 +483,37 @@ class GeometryTransform:
         rows = self.origin_image_array.shape[0]
         columns = self.origin_image_array.shape[1]
 
-        translate_image_array = np.zeros((rows, columns))
-        temp_array = np.zeros((rows, columns))  # 临时数组
-
-        # 横轴移动
-        if x_length > 0:
-            temp_array[:, x_length : columns] = self.origin_image_array[:, 0 : columns - x_length]
-        elif x_length < 0:
-            temp_array[:, 0 : columns + x_length] = self.origin_image_array[:, -x_length : columns]
-        else:
-            temp_array[:, 0 : columns] = self.origin_image_array[:, 0 : columns]
+        # 与原图像形状、类型相同，移出的部分为0
+        translate_image_array = np.zeros_like(self.origin_image_array)
 
-        # 纵轴移动
-        if y_length > 0:
-            translate_image_array[y_length : rows, :] = temp_array[0 : rows - y_length, :]
-        elif y_length < 0:
-            translate_image_array[0 : rows + y_length, :] = temp_array[-y_length : rows, :]
-        else:
-            translate_image_array[0 : rows, :] = temp_array[0 : rows, :]
+        # 计算横轴、纵轴方向上原图像和平移后图像对应的范围，一次复制完成平移
+        (src_columns, dst_columns) = self.get_translate_slices(x_length, columns)
+        (src_rows, dst_rows) = self.get_translate_slices(y_length, rows)
+        translate_image_array[dst_rows, dst_columns] = self.origin_image_array[src_rows, src_columns]
 
         return translate_image_array
 
+    '''
+    @brief 计算一个方向上平移前后对应的范围
+    @param length: 平移的长度，正负表示往正方向或负方向移动
+    @param size: 图像在该方向上的长度
+    @return src: 原图像中保留下来的范围
+    @return dst: 平移后这部分所在的范围
+    '''
+    def get_translate_slices (self, length, size):
+        length = max(-size, min(size, length))  # 平移超出图像时整个图像移出
+        if length >= 0:
+            return slice(0, size - length), slice(length, size)
+        else:
+            return slice(-length, size), slice(0, size + length)
+
     '''
     @brief 图像放大
     @param zoom_in_coef: 放大倍数，需要大于一
+    @param interpolation: 插值方法，"nearest"、"bilinear"、"bicubic"或"lanczos3"
     @return zoom_in_image_array: 放大后的图像数组
     '''
-    def image_zoom_in (self, zoom_in_coef):
+    def image_zoom_in (self, zoom_in_coef, interpolation = "bilinear"):
         # 获取原始图像的行数和列数
         rows = self.origin_image_array.shape[0]
         columns = self.origin_image_array.shape[1]
@@ -233,45 +522,85 @@ class GeometryTransform:
         rows_new = math.ceil(rows * zoom_in_coef)
         columns_new = math.ceil(columns * zoom_in_coef)
 
-        zoom_in_image_array = np.zeros((rows_new, columns_new))
-        temp_array = np.zeros((rows_new, columns))
+        # 预先计算两个方向的采样点和权重
+        row_indices, row_weights = self.interpolation_method.get_taps(self.get_zoom_in_position(rows_new, rows, zoom_in_coef), rows, interpolation)
+        column_indices, column_weights = self.interpolation_method.get_taps(self.get_zoom_in_position(columns_new, columns, zoom_in_coef), columns, interpolation)
 
         # 纵向放大
-        for i in range(rows_new):
-            x = i / zoom_in_coef
+        temp_array = self.interpolation_method.resample_axis(self.origin_image_array, row_indices, row_weights, axis = 0)
 
-            # 特殊情况
-            if x > rows - 1:
-                temp_array[i, :] = temp_array[i - 1, :]
-                continue
+        # 横向放大
+        zoom_in_image_array = self.interpolation_method.resample_axis(temp_array, column_indices, column_weights, axis = 1)
 
-            # 线性插值
-            x1 = int(x)
-            x2 = math.ceil(x)
-            temp_array[i, :] = self.interpolation_method.linear_interpolation(x1, x2, self.origin_image_array[x1, :], self.origin_image_array[x2, :], x)
+        return self.to_input_dtype(zoom_in_image_array)
 
-        # 横向放大
-        for i in range(columns_new):
-            x = i / zoom_in_coef
+    '''
+    @brief 计算金字塔下一层在一个方向上的采样点和权重，按每个像素实际覆盖的原图像像素数加权
+    @param cover: 当前层每个像素在该方向上覆盖的原图像像素数，长度为奇数时最后一个像素只覆盖一部分
+    @return indices: 采样点下标，形状为(2, 下一层长度)
+    @return weights: 采样点权重，形状与indices相同
+    @return cover_new: 下一层每个像素覆盖的原图像像素数
+    '''
+    def get_pyramid_taps (self, cover):
+        length = len(cover)
+        length_new = math.ceil(length / 2)
+        indices = np.arange(2)[:, None] + 2 * np.arange(length_new)[None, :]
+        weights = np.where(indices < length, cover[np.minimum(indices, length - 1)], 0)
+        indices = np.minimum(indices, length - 1)  # 超出图像的采样点权重为0，下标取边界即可
+        cover_new = weights.sum(axis = 0)
+        return indices, weights / cover_new[None, :], cover_new
 
-            # 特殊情况
-            if x > columns - 1:
-                zoom_in_image_array[:, i] = zoom_in_image_array[:, i - 1]
-                continue
-            
-            # 线性插值
-            x1 = int(x)
-            x2 = math.ceil(x)
-            zoom_in_image_array[:, i] = self.interpolation_method.linear_interpolation(x1, x2, temp_array[:, x1], temp_array[:, x2], x)
+    '''
+    @brief 构建图像金字塔，每一层由上一层区域平均缩小一半得到，每个像素都是其覆盖的原图像像素的平均值
+    @return levels: 从原图像开始的各层图像数组组成的元组
+    '''
+    def build_pyramid (self):
+        levels = [self.origin_image_array]
+        row_cover = np.ones(self.origin_image_array.shape[0])
+        column_cover = np.ones(self.origin_image_array.shape[1])
+        while min(levels[-1].shape[0], levels[-1].shape[1]) >= 2:
+            row_indices, row_weights, row_cover = self.get_pyramid_taps(row_cover)
+            column_indices, column_weights, column_cover = self.get_pyramid_taps(column_cover)
+            temp_array = self.interpolation_method.resample_axis(levels[-1], row_indices, row_weights, axis = 0)
+            levels.append(self.to_input_dtype(self.interpolation_method.resample_axis(temp_array, column_indices, column_weights, axis = 1)))
+        return tuple(levels)
+
+    '''
+    @brief 获取缩小时使用的金字塔层，每幅图像的金字塔只构建一次
+    @param zoom_out_coef: 缩小倍数
+    @return level_array: 不小于目标大小的最小一层图像数组
+    @return level_scale: 该层相对原图像的缩小倍数，该层每个像素对应原图像level_scale*level_scale个像素
+    '''
+    def get_pyramid_level (self, zoom_out_coef):
+        if self.image_key is None:
+            self.image_key = self.pyramid_cache.array_key(self.origin_image_array)
+        levels = self.pyramid_cache.get_or_compute(self.image_key, "pyramid", (), self.build_pyramid)
+
+        # 第k层约为原图像的1/2^k，选取2^k不大于缩小倍数的最高层
+        level = min(int(math.floor(math.log2(max(zoom_out_coef, 1)))), len(levels) - 1)
+        return levels[level], 2 ** level
 
-        return zoom_in_image_array
+    '''
+    @brief 计算放大后每个像素在原图像中的位置
+    @param length_new: 放大后在该方向上的长度
+    @param length: 原图像在该方向上的长度
+    @param zoom_in_coef: 放大倍数
+    @return position: 采样位置，超出原图像的部分沿用最后一个有效位置
+    '''
+    def get_zoom_in_position (self, length_new, length, zoom_in_coef):
+        position = np.arange(length_new) / zoom_in_coef
+        valid = position <= length - 1
+        position[~valid] = position[valid][-1]
+        return position
 
     '''
     @brief 图像缩小
     @param zoom_out_coef: 缩小倍数，需要大于一
+    @param method: "area"为区域平均，每个输出像素取其覆盖的源像素的加权平均，可以抑制混叠；其余为插值核名称，直接在采样位置插值
+    @param use_pyramid: 是否从图像金字塔中不小于目标大小的最小一层开始缩小，只有缩小倍数为2的幂时与直接区域平均一致（图像大小不是2的幂的倍数时也是如此，每层都舍入到原数据类型，uint8图像最多相差1），其余倍数为近似结果（例如在缩小一半的层上再缩小1.5倍时，每个输出像素混合了4个而不是3个原图像像素）
     @return zoom_out_image_array: 缩小后的图像数组
     '''
-    def image_zoom_out (self, zoom_out_coef):
+    def image_zoom_out (self, zoom_out_coef, method = "area", use_pyramid = False):
         # 获取原始图像的函数和列数
         rows = self.origin_image_array.shape[0]
         columns = self.origin_image_array.shape[1]
@@ -279,26 +608,31 @@ class GeometryTransform:
         rows_new = math.ceil(rows / zoom_out_coef)
         columns_new = math.ceil(columns / zoom_out_coef)
 
-        zoom_out_image_array = np.zeros((rows_new, columns_new))
-        temp_array = np.zeros((rows_new, columns))
+        # 选取缩小的起点图像，并计算从该图像开始还需要缩小的倍数
+        if use_pyramid:
+            source_array, level_scale = self.get_pyramid_level(zoom_out_coef)
+        else:
+            source_array, level_scale = self.origin_image_array, 1
+        source_rows = source_array.shape[0]
+        source_columns = source_array.shape[1]
+        row_coef = zoom_out_coef / level_scale
+        column_coef = zoom_out_coef / level_scale
+
+        # 预先计算两个方向的采样点和权重
+        if method == "area":
+            row_indices, row_weights = self.interpolation_method.get_area_taps(rows_new, source_rows, row_coef)
+            column_indices, column_weights = self.interpolation_method.get_area_taps(columns_new, source_columns, column_coef)
+        else:
+            row_indices, row_weights = self.interpolation_method.get_taps(np.arange(rows_new) * row_coef, source_rows, method)
+            column_indices, column_weights = self.interpolation_method.get_taps(np.arange(columns_new) * column_coef, source_columns, method)
 
         # 纵向缩小
-        for i in range(rows_new):
-            # 线性插值
-            x = i * zoom_out_coef
-            x1 = int(x)
-            x2 = math.ceil(x)
-            temp_array[i, :] = self.interpolation_method.linear_interpolation(x1, x2, self.origin_image_array[x1, :], self.origin_image_array[x2, :], x)
-        
+        temp_array = self.interpolation_method.resample_axis(source_array, row_indices, row_weights, axis = 0)
+
         # 横向缩小
-        for i in range(columns_new):    
-            # 线性插值
-            x = i * zoom_out_coef
-            x1 = int(x)
-            x2 = math.ceil(x)
-            zoom_out_image_array[:, i] = self.interpolation_method.linear_interpolation(x1, x2, temp_array[:, x1], temp_array[:, x2], x)
+        zoom_out_image_array = self.interpolation_method.resample_axis(temp_array, column_indices, column_weights, axis = 1)
 
-        return zoom_out_image_array
+        return self.to_input_dtype(zoom_out_image_array)
 
 '''
 @brief 点击图像转置按键回调
@@ -470,7 +804,7 @@ def click_zoom_out_button ():
     bool_var.set(False)  # 复位bool_var
 
     # 获取缩小后的图像数组
-    zoom_out_image_array = geometry_transform.image_zoom_out(zoom_out_coef)
+    zoom_out_image_array = geometry_transform.image_zoom_out(zoom_out_coef, use_pyramid = True)  # 界面中优先响应速度，使用金字塔近似
 
     # 显示转换后的图片
     show_image(zoom_out_image_array)
@@ -500,9 +834,11 @@ def file_operation ():
     if file_format_str == "raw":
         image_array = read_raw(file_path)
         image = Image.fromarray(image_array)
+        origin_tip = "原图像"
     else:
         image = Image.open(file_path)
         image_array = get_image_array(image)
+        origin_tip = f"原图像，{get_load_info()}"  # 显示读取图像数组的耗时和分配的内存
 
     # 创建GeometryTransform类对象
     interpolation = Interpolation()
@@ -513,7 +849,7 @@ def file_operation ():
 
     # 显示图像
     origin_image_label.config(image = origin_image_tk)
-    origin_image_tip.config(text = "原图像")
+    origin_image_tip.config(text = origin_tip)
     transformed_image_label.config(image = "")
     transformed_image_tip.config(text = "")
 
@@ -0,0 +1,28 @@
+import numpy as np
+
+class WarpMap:
+    '''
+    @brief 预先计算好的坐标映射，保存每个输出像素对应的源像素下标和插值权重
+    @param indices: 源像素在展平后的原图像中的下标，形状为(采样点数, 输出像素数)
+    @param weights: 每个采样点的插值权重，形状与indices相同，不属于原图像的输出像素权重为0
+    @param output_shape: 输出图像的行数和列数
+    '''
+    def __init__ (self, indices, weights, output_shape):
+        self.indices = indices
+        self.weights = weights
+        self.output_shape = tuple(output_shape)
+
+    '''
+    @brief 对图像应用坐标映射，多通道图像的所有通道共用同一个映射
+    @param image_array: 原图像数组，H*W或H*W*C，行数和列数需要与构建映射时的原图像相同
+    @return result: 变换后的图像数组，通道数与原图像相同
+    '''
+    def apply (self, image_array):
+        channel_shape = image_array.shape[2:]
+
+        # 每个像素的所有通道在内存中连续存放，一次取值即可取出整个像素
+        flat_array = np.ascontiguousarray(image_array).reshape(image_array.shape[0] * image_array.shape[1], -1)
+        result = self.weights[0][:, None] * flat_array[self.indices[0]]
+        for i in range(1, len(self.indices)):
+            result += self.weights[i][:, None] * flat_array[self.indices[i]]
+        return result.reshape(self.output_shape + channel_shape)
@@ -0,0 +1,115 @@
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from histogram import get_gray_histogram
+
+'''
+@brief 由直方图计算直方图均衡化的查找表
+@param histogram: 256个灰度值的直方图
+@return table: uint8的查找表，table[r]为灰度值r均衡化后的灰度值
+'''
+def get_equalization_table (histogram):
+    grayscale_cdf = np.cumsum(histogram, dtype = np.float64)  # 直方图的累加和即为累积分布函数
+    table = (255 / grayscale_cdf[-1]) * grayscale_cdf
+    return table.astype(np.uint8)
+
+'''
+@brief 全局直方图均衡化
+@param image_array: 灰度值在0~255之间的图像数组
+@return 均衡化后的uint8图像数组
+'''
+def equalize_histogram (image_array):
+    table = get_equalization_table(get_gray_histogram(image_array, bins = 256))
+    return np.take(table, image_array)
+
+'''
+@brief 限制对比度后计算一个分块的查找表
+@param tile: 分块的图像数组
+@param clip_limit: 对比度限制，直方图每个灰度值的计数不超过平均计数的clip_limit倍
+@return table: 分块的uint8查找表
+'''
+def get_clahe_table (tile, clip_limit):
+    histogram = get_gray_histogram(tile, bins = 256).astype(np.float64)
+
+    # 裁剪直方图，超出部分平均分配到所有灰度值
+    if clip_limit > 0:
+        clip_count = max(clip_limit * tile.size / 256, 1)
+        excess = np.sum(np.maximum(histogram - clip_count, 0))
+        histogram = np.minimum(histogram, clip_count) + excess / 256
+
+    return get_equalization_table(histogram)
+
+'''
+@brief 计算每个像素所在的相邻两个分块及插值权重
+@param length: 图像在该方向上的长度
+@param edges: 分块的边界
+@return index_0: 前一个分块的序号
+@return index_1: 后一个分块的序号
+@return weight: 后一个分块的权重
+'''
+def get_blend_weights (length, edges):
+    centers = (edges[:-1] + edges[1:] - 1) / 2  # 分块中心
+    position = np.arange(length)
+    index_0 = np.clip(np.searchsorted(centers, position, side = "right") - 1, 0, len(centers) - 1)
+    index_1 = np.minimum(index_0 + 1, len(centers) - 1)
+    distance = centers[index_1] - centers[index_0]
+    weight = np.zeros(length)
+    np.divide(position - centers[index_0], distance, out = weight, where = distance > 0)
+    weight = np.clip(weight, 0, 1)  # 图像边缘处只使用最近的分块
+    return index_0, index_1, weight
+
+'''
+@brief 限制对比度自适应直方图均衡化（CLAHE）
+@param image_array: 灰度值在0~255之间的二维图像数组
+@param tile_grid: 分块的行数和列数
+@param clip_limit: 对比度限制，小于等于0时不限制
+@param workers: 并行线程数，为None时由ThreadPoolExecutor决定
+@return 均衡化后的uint8图像数组
+'''
+def clahe (image_array, tile_grid = (8, 8), clip_limit = 2.0, workers = None):
+    rows, columns = image_array.shape
+    tile_rows = min(tile_grid[0], rows)
+    tile_columns = min(tile_grid[1], columns)
+    row_edges = np.linspace(0, rows, tile_rows + 1).astype(int)
+    column_edges = np.linspace(0, columns, tile_columns + 1).astype(int)
+
+    row_0, row_1, row_weight = get_blend_weights(rows, row_edges)
+    column_0, column_1, column_weight = get_blend_weights(columns, column_edges)
+
+    '''
+    @brief 计算第i个分块的查找表
+    @param i: 分块序号，按行优先排列
+    @return 该分块的查找表
+    '''
+    def tile_table (i):
+        r, c = divmod(i, tile_columns)
+        tile = image_array[row_edges[r] : row_edges[r + 1], column_edges[c] : column_edges[c + 1]]
+        return get_clahe_table(tile, clip_limit)
+
+    '''
+    @brief 对第r行分块覆盖的图像行进行双线性插值
+    @param r: 分块的行序号
+    @return 插值后的图像行
+    '''
+    def blend_band (r):
+        band = slice(row_edges[r], row_edges[r + 1])
+        value = image_array[band].astype(np.intp)
+
+        # 四个相邻分块的查找表在tables中的展平下标
+        top = row_0[band, None] * tile_columns
+        bottom = row_1[band, None] * tile_columns
+        index_00 = (top + column_0[None, :]) * 256 + value
+        index_01 = (top + column_1[None, :]) * 256 + value
+        index_10 = (bottom + column_0[None, :]) * 256 + value
+        index_11 = (bottom + column_1[None, :]) * 256 + value
+
+        wx = column_weight[None, :]
+        wy = row_weight[band, None]
+        upper = (1 - wx) * tables[index_00] + wx * tables[index_01]
+        lower = (1 - wx) * tables[index_10] + wx * tables[index_11]
+        return np.rint((1 - wy) * upper + wy * lower).astype(np.uint8)
+
+    with ThreadPoolExecutor(max_workers = workers) as executor:
+        tables = np.concatenate(list(executor.map(tile_table, range(tile_rows * tile_columns)))).astype(np.float64)
+        bands = list(executor.map(blend_band, range(tile_rows)))
+
+    return np.concatenate(bands)
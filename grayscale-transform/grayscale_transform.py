@@ -7,6 +7,10 @@ import numpy as np
 from matplotlib import pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from matplotlib.figure import Figure
+from histogram import get_gray_histogram
+from lookup_table import LookupTable
+from image_loader import load_image_array, get_load_info
+from equalization import equalize_histogram, clahe
 
 '''
 @brief 获取灰度图像数据
@@ -17,8 +21,8 @@ from matplotlib.figure import Figure
 '''
 def get_image_data (image):
     (width, height) = image.size  # 获取图像的宽和高
-    image_array = np.array(image.getdata())  # 获取图像的像素数据并转化为数组
-    image_array = image_array.reshape((height, width))  # 转化为二维数组
+    image_array = load_image_array(image)  # 获取uint8的二维图像数组
+    load_info_label.config(text = get_load_info())  # 显示读取图像数组的耗时和分配的内存
     return width, height, image_array
 
 '''
@@ -27,9 +31,7 @@ def get_image_data (image):
 '''
 def show_histogram (image_array, histogram, canvas):
     all_gray = np.arange(256)
-    gray_distribution = np.zeros(256)
-    for i in range(256):
-        gray_distribution[i] = np.count_nonzero(image_array == i)  # 获取每个像素值出现的个数
+    gray_distribution = get_gray_histogram(image_array, bins = 256)  # 一次遍历获取每个像素值出现的个数
 
     # 绘制直方图
     histogram.clear()  # 清除原图表
@@ -77,11 +79,10 @@ class GrayscaleTransform:
     '''
     def reverse (self, image):
         # 获取图像数据
-        width, height, image_array = get_image_data(image)
+        _, _, image_array = get_image_data(image)
 
         # 灰度反转
-        array_255 = np.ones((height, width)) * 255
-        image_array = array_255 - image_array
+        image_array = LookupTable().reverse().apply(image_array)
 
         # 显示反转后的图像
         show_transformed_image(image_array)
@@ -101,11 +102,9 @@ class GrayscaleTransform:
         log_base = float(log_base_entry.get())
         coef = float(log_coef_entry.get())
 
-        # 灰度对数变换
-        image_array = coef * (np.log1p(image_array) / np.log(log_base))  # 使用对数换底公式进行灰度对数变换
-        # image_array = np.clip(image_array, None, 255)  # 将数组的值限制在[0, 255]
-        image_array = 255 / (np.max(image_array)) * image_array  # 将数组的值归一化到[0, 255]
-        image_array = image_array.astype(np.uint8)  # 转换为无符号8位整数
+        # 灰度对数变换，在查找表上完成变换和归一化，再一次查表得到uint8图像
+        lookup_table = LookupTable().log(log_base, coef).normalize(image_array)
+        image_array = lookup_table.apply(image_array)
 
         # 显示对数变换后的图像
         show_transformed_image(image_array)
@@ -125,11 +124,9 @@ class GrayscaleTransform:
         pow_num = float(pow_num_entry.get())
         coef = float(pow_coef_entry.get())
 
-        # 灰度幂次变换
-        image_array = coef * (np.power(image_array, pow_num))  # 进行灰度幂次变换
-        # image_array = np.clip(image_array, None, 255)  # 将数组的值限制在[0, 255]
-        image_array = 255 / (np.max(image_array)) * image_array  # 将数组的值归一化到[0, 255]
-        image_array = image_array.astype(np.uint8)  # 转换为无符号8位整数
+        # 灰度幂次变换，在查找表上完成变换和归一化，再一次查表得到uint8图像
+        lookup_table = LookupTable().pow(pow_num, coef).normalize(image_array)
+        image_array = lookup_table.apply(image_array)
         
         # 显示幂次变换后的图像
         show_transformed_image(image_array)
@@ -143,22 +140,36 @@ class GrayscaleTransform:
     '''
     def histogram_equalization (self, image):
         # 获取图像数据
-        width, height, image_array = get_image_data(image)
-        pixel_num = width * height  # 计算像素数总数
-        
-        # 计算累积分布函数
-        grayscale_cdf = np.zeros(256)  # 初始化累积分布函数数组
-        for i in range(256):  # 计算每一像素值处的函数值
-            grayscale_cdf[i] = np.count_nonzero(image_array == i) if i == 0 else grayscale_cdf[i - 1] + np.count_nonzero(image_array == i)
+        _, _, image_array = get_image_data(image)
 
-        # 直方图均衡化
-        image_array = (255 / pixel_num) * grayscale_cdf[image_array]
-        image_array = image_array.astype(np.uint8)  # 转换为无符号8位整数
+        # 直方图均衡化，由累积分布函数得到uint8查找表后一次查表
+        image_array = equalize_histogram(image_array)
 
-        # 显示幂次变换后的图像
+        # 显示均衡化后的图像
         show_transformed_image(image_array)
 
-        # 绘制幂次变换后的图像的直方图
+        # 绘制均衡化后的图像的直方图
+        show_histogram(image_array, histogram_transformed, canvas_transformed)
+
+    '''
+    @brief 限制对比度自适应直方图均衡化（CLAHE）
+    @param image: PIL的Image类
+    '''
+    def adaptive_histogram_equalization (self, image):
+        # 获取图像数据
+        _, _, image_array = get_image_data(image)
+
+        # 获取输入数据
+        clip_limit = float(clahe_clip_entry.get())
+        grid_size = int(clahe_grid_entry.get())
+
+        # 分块均衡化，分块之间双线性插值
+        image_array = clahe(image_array, tile_grid = (grid_size, grid_size), clip_limit = clip_limit)
+
+        # 显示均衡化后的图像
+        show_transformed_image(image_array)
+
+        # 绘制均衡化后的图像的直方图
         show_histogram(image_array, histogram_transformed, canvas_transformed)
 
 if __name__ == '__main__':
@@ -198,6 +209,8 @@ if __name__ == '__main__':
     reverse_button.grid(row = 1, column = 0)
     equalization_button = ttk.Button(frame, text = "直方图均衡化", command = lambda: grayscale_transform.histogram_equalization(origin_image))
     equalization_button.grid(row = 1, column = 1)
+    clahe_button = ttk.Button(frame, text = "自适应直方图均衡化", command = lambda: grayscale_transform.adaptive_histogram_equalization(origin_image))
+    clahe_button.grid(row = 1, column = 2)
     pow_button = ttk.Button(frame, text = "幂次变换", command = lambda: grayscale_transform.pow_transform(origin_image))
     pow_button.grid(row = 2, column = 0)
     log_button = ttk.Button(frame, text = "对数变换", command = lambda: grayscale_transform.log_transform(origin_image))
@@ -226,10 +239,26 @@ if __name__ == '__main__':
     log_coef_entry_tip.grid(row = 1, column = 0)
     log_coef_entry = ttk.Entry(log_param_entry_frame)
     log_coef_entry.grid(row = 1, column = 1)
+
+    # 创建自适应直方图均衡化参数输入框
+    clahe_param_entry_frame = ttk.Frame(frame)
+    clahe_param_entry_frame.grid(row = 2, column = 2)
+    clahe_clip_entry_tip = ttk.Label(clahe_param_entry_frame, text = "请输入对比度限制：")
+    clahe_clip_entry_tip.grid(row = 0, column = 0)
+    clahe_clip_entry = ttk.Entry(clahe_param_entry_frame)
+    clahe_clip_entry.insert(0, "2.0")
+    clahe_clip_entry.grid(row = 0, column = 1)
+    clahe_grid_entry_tip = ttk.Label(clahe_param_entry_frame, text = "请输入分块数：")
+    clahe_grid_entry_tip.grid(row = 1, column = 0)
+    clahe_grid_entry = ttk.Entry(clahe_param_entry_frame)
+    clahe_grid_entry.insert(0, "8")
+    clahe_grid_entry.grid(row = 1, column = 1)
     
     # 用于显示原始图像和转换后的图像
     origin_image_label = ttk.Label(frame)  # 显示原始图像
     origin_image_label.grid(row = 4, column = 0)
+    load_info_label = ttk.Label(frame)  # 显示读取耗时和内存
+    load_info_label.grid(row = 5, column = 0)
     transformed_image_label = ttk.Label(frame)  # 显示转换后的图像
     transformed_image_label.grid(row = 6, column = 0)
 
@@ -0,0 +1,99 @@
+import numpy as np
+
+'''
+@brief 获取直方图的灰度级数量
+@param image_array: 图像数组
+@return uint16图像为65536，其余为256
+'''
+def get_bins (image_array):
+    return 65536 if image_array.dtype == np.uint16 else 256
+
+'''
+@brief 将像素值转换为可以用于bincount的下标，不在[0, bins)内或不是整数的像素值不参与统计
+@param values: 像素值数组
+@param bins: 灰度级数量
+@return 一维下标数组
+'''
+def to_bin_index (values, bins):
+    values = values.reshape(-1)
+
+    # uint8和uint16的像素值一定在范围内
+    if values.dtype == np.uint8 or (values.dtype == np.uint16 and bins == 65536):
+        return values
+
+    valid = (values >= 0) & (values < bins)
+    if not np.issubdtype(values.dtype, np.integer):
+        valid &= values == np.floor(values)
+
+    return values[valid].astype(np.intp)
+
+'''
+@brief 按行分块遍历图像，对内存映射数组每次只读取一块
+@param image_array: 图像数组
+@param mask: 与图像行列数相同的布尔数组，为None时统计全部像素
+@param chunk_rows: 每块的行数，为None时每块约为1600万个像素
+@return 依次产生每一块的图像和掩膜
+'''
+def iterate_chunks (image_array, mask, chunk_rows):
+    rows = image_array.shape[0]
+    if chunk_rows is None:
+        pixels_per_row = max(1, image_array[0].size)
+        chunk_rows = max(1, (1 << 24) // pixels_per_row)
+
+    for row_start in range(0, rows, chunk_rows):
+        row_stop = min(row_start + chunk_rows, rows)
+        chunk = np.asarray(image_array[row_start : row_stop])
+        chunk_mask = None if mask is None else np.asarray(mask[row_start : row_stop], dtype = bool)
+        yield chunk, chunk_mask
+
+'''
+@brief 计算单通道图像的直方图，只遍历图像一次
+@param image_array: 二维图像数组，支持uint8、uint16以及内存映射数组
+@param mask: 与图像大小相同的布尔数组，只统计为True的像素，为None时统计全部像素
+@param bins: 灰度级数量，为None时由图像的数据类型决定
+@param chunk_rows: 分块统计时每块的行数
+@return histogram: 每个灰度值出现的次数
+'''
+def get_gray_histogram (image_array, mask = None, bins = None, chunk_rows = None):
+    if bins is None:
+        bins = get_bins(image_array)
+
+    histogram = np.zeros(bins, dtype = np.int64)
+    for chunk, chunk_mask in iterate_chunks(image_array, mask, chunk_rows):
+        values = chunk if chunk_mask is None else chunk[chunk_mask]
+        histogram += np.bincount(to_bin_index(values, bins), minlength = bins)[:bins]
+
+    return histogram
+
+'''
+@brief 计算多通道图像每个通道的直方图，各通道的像素值加上不同的偏移后用一次bincount统计
+@param image_array: 通道在最后一维的图像数组（H*W*C），支持uint8、uint16以及内存映射数组
+@param mask: 与图像行列数相同的布尔数组，只统计为True的像素，为None时统计全部像素
+@param bins: 灰度级数量，为None时由图像的数据类型决定
+@param chunk_rows: 分块统计时每块的行数
+@return histogram: 大小为C*bins的数组，第i行是第i个通道的直方图
+'''
+def get_channel_histogram (image_array, mask = None, bins = None, chunk_rows = None):
+    if bins is None:
+        bins = get_bins(image_array)
+
+    channels = image_array.shape[-1]
+    offsets = np.arange(channels, dtype = np.intp) * bins  # 第i个通道的偏移为i*bins
+
+    histogram = np.zeros(channels * bins, dtype = np.int64)
+    for chunk, chunk_mask in iterate_chunks(image_array, mask, chunk_rows):
+        pixels = chunk.reshape(-1, channels) if chunk_mask is None else chunk[chunk_mask]
+
+        # 超出范围的像素值不参与统计，只有灰度级数量覆盖数据类型的全部取值时才能跳过检查
+        if (pixels.dtype == np.uint8 and bins >= 256) or (pixels.dtype == np.uint16 and bins >= 65536):
+            index = pixels.astype(np.intp) + offsets
+        else:
+            valid = (pixels >= 0) & (pixels < bins)
+            if not np.issubdtype(pixels.dtype, np.integer):
+                valid &= pixels == np.floor(pixels)
+            index = np.where(valid, pixels, 0).astype(np.intp) + offsets
+            index = index[valid]
+
+        histogram += np.bincount(index.reshape(-1), minlength = channels * bins)
+
+    return histogram.reshape(channels, bins)
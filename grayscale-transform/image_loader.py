@@ -0,0 +1,71 @@
+import numpy as np
+import time
+
+class ImageLoader:
+    '''
+    @brief 将PIL图像转换为numpy数组，保持uint8类型，并统计转换耗时和分配的字节数
+    '''
+    def __init__ (self):
+        self.load_count = 0  # 转换次数
+        self.total_time = 0.0  # 总耗时（秒）
+        self.total_bytes = 0  # 总分配字节数
+        self.last_time = 0.0  # 最近一次转换的耗时（秒）
+        self.last_bytes = 0  # 最近一次转换分配的字节数
+
+    '''
+    @brief 获取图像数组
+    @param image: PIL的Image类
+    @param mode: 需要转换到的图像模式，为None时保持原模式
+    @return image_array: 图像数组，灰度图像为H*W，彩色图像为H*W*C，类型与图像模式一致（一般为uint8），可能是只读的
+    '''
+    def load (self, image, mode = None):
+        start = time.perf_counter()
+        allocated = 0
+
+        # 模式转换会生成新的图像
+        if mode is not None and image.mode != mode:
+            image = image.convert(mode)
+            allocated += len(image.getbands()) * image.size[0] * image.size[1]
+
+        # 通过数组接口直接获取像素数据，不会为每个像素创建Python对象
+        image_array = np.asarray(image)
+        allocated += image_array.nbytes
+
+        self.last_time = time.perf_counter() - start
+        self.last_bytes = allocated
+        self.load_count += 1
+        self.total_time += self.last_time
+        self.total_bytes += allocated
+        return image_array
+
+    '''
+    @brief 获取转换统计信息
+    @return 转换次数、总耗时、总字节数以及最近一次转换的耗时和字节数
+    '''
+    def get_stats (self):
+        return {
+            "load_count": self.load_count,
+            "total_time": self.total_time,
+            "total_bytes": self.total_bytes,
+            "last_time": self.last_time,
+            "last_bytes": self.last_bytes,
+        }
+
+image_loader = ImageLoader()  # 模块共享的加载器
+
+'''
+@brief 使用模块共享的加载器获取图像数组
+@param image: PIL的Image类
+@param mode: 需要转换到的图像模式，为None时保持原模式
+@return image_array: 图像数组
+'''
+def load_image_array (image, mode = None):
+    return image_loader.load(image, mode)
+
+'''
+@brief 获取模块共享的加载器最近一次转换的耗时和分配的字节数，用于在界面上显示
+@return 描述字符串
+'''
+def get_load_info ():
+    stats = image_loader.get_stats()
+    return f"读取耗时{stats['last_time'] * 1000:.1f}ms，分配{stats['last_bytes'] / (1024 * 1024):.2f}MB（共读取{stats['load_count']}次，累计{stats['total_time'] * 1000:.1f}ms）"
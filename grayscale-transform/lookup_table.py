@@ -0,0 +1,73 @@
+import numpy as np
+from histogram import get_gray_histogram
+
+class LookupTable:
+    '''
+    @brief 灰度点运算的查找表，8位图像只有256种灰度值，点运算只需在0~255上计算一次
+    @param table: 256个灰度值变换后的浮点值，为None时为恒等变换
+    '''
+    def __init__ (self, table = None):
+        if table is None:
+            table = np.arange(256, dtype = np.float64)
+        self.table = np.asarray(table, dtype = np.float64)
+
+    '''
+    @brief 在当前查找表之后复合一个点运算，多个点运算融合为一张表
+    @param function: 作用在浮点数组上的点运算
+    @return 复合后的查找表
+    '''
+    def then (self, function):
+        return LookupTable(function(self.table))
+
+    '''
+    @brief 复合灰度反转
+    @return 复合后的查找表
+    '''
+    def reverse (self):
+        return self.then(lambda x: 255 - x)
+
+    '''
+    @brief 复合对数变换 s = coef * log_base(1 + r)
+    @param log_base: 对数的底数
+    @param coef: 系数
+    @return 复合后的查找表
+    '''
+    def log (self, log_base, coef):
+        return self.then(lambda x: coef * (np.log1p(x) / np.log(log_base)))  # 使用对数换底公式
+
+    '''
+    @brief 复合幂次变换 s = coef * r ^ pow_num
+    @param pow_num: 幂次
+    @param coef: 系数
+    @return 复合后的查找表
+    '''
+    def pow (self, pow_num, coef):
+        return self.then(lambda x: coef * np.power(x, pow_num))
+
+    '''
+    @brief 将查找表的值归一化到[0, 255]
+    @param image_array: 图像数组，不为None时只用图像中出现的灰度值对应的表项求最大值
+    @return 复合后的查找表
+    '''
+    def normalize (self, image_array = None):
+        if image_array is None:
+            max_value = np.max(self.table)
+        else:
+            present = get_gray_histogram(image_array, bins = 256) > 0  # 图像中出现过的灰度值
+            max_value = np.max(self.table[present])
+        return self.then(lambda x: 255 / max_value * x)
+
+    '''
+    @brief 将查找表编译为8位无符号整数表
+    @return table: uint8的查找表
+    '''
+    def compile (self):
+        return self.table.astype(np.uint8)
+
+    '''
+    @brief 对图像应用查找表
+    @param image_array: 灰度值在0~255之间的图像数组
+    @return 变换后的uint8图像数组
+    '''
+    def apply (self, image_array):
+        return np.take(self.compile(), image_array)
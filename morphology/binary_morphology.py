@@ -0,0 +1,164 @@
+import numpy as np
+
+'''
+@brief 判断图像是否为二值图像（只含0和另一个值）
+@param image_array: 图像数组
+@return binary_value: 前景的值，不是二值图像时为None
+'''
+def get_binary_value (image_array):
+    if image_array.dtype != np.uint8:
+        return None
+
+    # 一次遍历统计出现的灰度值
+    levels = np.flatnonzero(np.bincount(image_array.ravel(), minlength = 256))
+    if len(levels) == 1:
+        return int(levels[0]) if levels[0] != 0 else 255
+    if len(levels) == 2 and levels[0] == 0:
+        return int(levels[1])
+    return None
+
+'''
+@brief 将二值掩膜按行打包为64位字，第c列在第c // 64个字的第c % 64位
+@param mask: 布尔数组
+@return words: uint64数组，形状为(行数, 字数)
+'''
+def pack_mask (mask):
+    packed = np.packbits(mask, axis = 1, bitorder = "little")
+    pad_bytes = -packed.shape[1] % 8
+    packed = np.pad(packed, ((0, 0), (0, pad_bytes)))
+    return np.ascontiguousarray(packed).view("<u8")
+
+'''
+@brief 将64位字解包为二值掩膜
+@param words: uint64数组
+@param columns: 掩膜的列数
+@return mask: 布尔数组
+'''
+def unpack_mask (words, columns):
+    packed = np.ascontiguousarray(words).view(np.uint8)
+    return np.unpackbits(packed, axis = 1, count = columns, bitorder = "little").astype(bool)
+
+'''
+@brief 平移打包后的掩膜，移入的部分填0
+@param words: uint64数组
+@param shift: 结果的第i行（列）取原掩膜的第i + shift行（列）
+@param axis: 0为按行平移，1为按列（位）平移
+@return result: 平移后的uint64数组
+'''
+def shift_words (words, shift, axis):
+    if shift == 0:
+        return words
+
+    # 按行平移只需整行复制
+    if axis == 0:
+        result = np.zeros_like(words)
+        rows = words.shape[0]
+        if abs(shift) < rows:
+            if shift > 0:
+                result[: rows - shift] = words[shift :]
+            else:
+                result[-shift :] = words[: rows + shift]
+        return result
+
+    # 按列平移：先整字平移，再在相邻两个字之间移位
+    (word_shift, bit_shift) = divmod(shift, 64)
+
+    '''
+    @brief 整字平移，结果的第k个字取原数组的第k + offset个字
+    @param offset: 整字平移的字数
+    @return 平移后的uint64数组
+    '''
+    def take_words (offset):
+        result = np.zeros_like(words)
+        count = words.shape[1]
+        if abs(offset) < count:
+            if offset > 0:
+                result[:, : count - offset] = words[:, offset :]
+            else:
+                result[:, -offset :] = words[:, : count + offset]
+        return result
+
+    result = take_words(word_shift)
+    if bit_shift == 0:
+        return result
+    result >>= np.uint64(bit_shift)
+    result |= take_words(word_shift + 1) << np.uint64(64 - bit_shift)
+    return result
+
+'''
+@brief 对打包后的掩膜沿一个方向求连续length个像素的或（与），采用倍增法，只需log2(length)次平移
+@param words: uint64数组
+@param length: 窗口长度
+@param axis: 0为按行，1为按列
+@param operation: np.bitwise_or（膨胀）或np.bitwise_and（腐蚀）
+@return result: 结果的第i个像素为原掩膜第i到i + length - 1个像素的或（与）
+'''
+def run_reduce (words, length, axis, operation):
+    result = words
+    span = 1
+    while span * 2 <= length:
+        result = operation(result, shift_words(result, span, axis))
+        span *= 2
+    if span < length:
+        result = operation(result, shift_words(result, length - span, axis))
+    return result
+
+'''
+@brief 使用任意结构元对二值掩膜进行膨胀或腐蚀，图像外按0处理
+@param mask: 布尔数组
+@param method: "dilation"或"erosion"
+@param se: StructuringElement对象
+@return 处理后的布尔数组
+'''
+def binary_se_morphology (mask, method, se):
+    operation = np.bitwise_or if method == "dilation" else np.bitwise_and
+    rows = mask.shape[0]
+    columns = mask.shape[1]
+
+    # 按结构元大小零填充后打包，窗口平移时不会丢掉与图像部分重叠的部分
+    (pad_rows, pad_columns) = se.mask.shape
+    expand_mask = np.pad(mask, ((pad_rows, pad_rows), (pad_columns, pad_columns)))
+    words = pack_mask(expand_mask)
+
+    # 结构元是若干矩形块的并集，每个矩形块先按列再按行求或（与），再平移到实际位置
+    row_results = {}  # 按列处理的结果，列数相同的矩形块共用
+    result = None
+    for (row_offset, column_offset, height, width) in se.get_blocks():
+        if width not in row_results:
+            row_results[width] = run_reduce(words, width, 1, operation)
+        block_result = run_reduce(row_results[width], height, 0, operation)
+        block_result = shift_words(shift_words(block_result, row_offset, 0), column_offset, 1)
+        result = block_result if result is None else operation(result, block_result)
+
+    result_mask = unpack_mask(result, expand_mask.shape[1])
+    return result_mask[pad_rows : pad_rows + rows, pad_columns : pad_columns + columns]
+
+'''
+@brief 二值形态学处理
+@param mask: 布尔数组
+@param method: "dilation"、"erosion"、"opening"或"closing"
+@param dilation_se: 膨胀结构元，StructuringElement对象
+@param erosion_se: 腐蚀结构元，StructuringElement对象
+@return result: 处理后的布尔数组
+'''
+def binary_morphology_process (mask, method, dilation_se, erosion_se):
+    if method == "dilation":
+        result = binary_se_morphology(mask, "dilation", dilation_se)
+    elif method == "erosion":
+        result = binary_se_morphology(mask, "erosion", erosion_se)
+    elif method == "opening":
+        result = binary_se_morphology(mask, "erosion", erosion_se)
+        result = binary_se_morphology(result, "dilation", dilation_se)
+    elif method == "closing":
+        result = binary_se_morphology(mask, "dilation", dilation_se)
+        result = binary_se_morphology(result, "erosion", erosion_se)
+    return result
+
+'''
+@brief 二值图像的边界，即原掩膜减去腐蚀后的掩膜
+@param mask: 布尔数组
+@param se: StructuringElement对象
+@return 边界的布尔数组
+'''
+def binary_boundary (mask, se):
+    return mask & ~binary_se_morphology(mask, "erosion", se)
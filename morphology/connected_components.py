@@ -0,0 +1,113 @@
+import numpy as np
+
+'''
+@brief 对二值掩膜逐行进行游程编码
+@param mask: 布尔数组
+@return run_rows: 每个游程所在的行
+@return run_starts: 每个游程的起始列
+@return run_stops: 每个游程的结束列，不包含结束列
+'''
+def get_runs (mask):
+    padded = np.pad(mask, ((0, 0), (1, 1))).astype(np.int8)
+    edges = np.diff(padded, axis = 1)
+    run_rows, run_starts = np.nonzero(edges == 1)  # 按行优先顺序排列
+    _, run_stops = np.nonzero(edges == -1)
+    return run_rows, run_starts, run_stops
+
+'''
+@brief 找出相邻两行中相互连通的游程对
+@param run_rows: 游程所在的行
+@param run_starts: 游程的起始列
+@param run_stops: 游程的结束列
+@param columns: 图像列数
+@param connectivity: 4或8
+@return current: 连通对中下一行游程的序号
+@return previous: 连通对中上一行游程的序号
+'''
+def get_run_pairs (run_rows, run_starts, run_stops, columns, connectivity):
+    # 8-邻域时斜对角相邻的游程也连通
+    k = 1 if connectivity == 8 else 0
+
+    # 行号和列号合成单调递增的键，上一行中与当前游程连通的游程是一段连续的序号
+    key_scale = columns + 2
+    start_keys = run_rows * key_scale + run_starts
+    stop_keys = run_rows * key_scale + run_stops
+    previous_row = (run_rows - 1) * key_scale
+    low = np.searchsorted(stop_keys, previous_row + run_starts - k, side = "right")
+    high = np.searchsorted(start_keys, previous_row + run_stops + k, side = "left")
+
+    # 展开为游程对
+    counts = np.maximum(high - low, 0)
+    current = np.repeat(np.arange(len(run_rows)), counts)
+    offsets = np.arange(len(current)) - np.repeat(np.cumsum(counts) - counts, counts)
+    previous = low[current] + offsets
+    return current, previous
+
+'''
+@brief 基于数组的并查集，合并所有连通对，并压缩路径使每个元素直接指向根
+@param count: 元素个数
+@param first: 连通对的一端
+@param second: 连通对的另一端
+@return parent: 每个元素所在集合的根，根为集合中序号最小的元素
+'''
+def union_find (count, first, second):
+    parent = np.arange(count)
+
+    while True:
+        # 路径压缩：指针跳跃直到每个元素都直接指向根
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+        # 合并：根不同的连通对，把较大的根挂到较小的根上
+        root_1 = parent[first]
+        root_2 = parent[second]
+        differ = root_1 != root_2
+        if not np.any(differ):
+            return parent
+        np.minimum.at(parent, np.maximum(root_1[differ], root_2[differ]), np.minimum(root_1[differ], root_2[differ]))
+
+'''
+@brief 连通域标记
+@param mask: 布尔数组，True为前景
+@param connectivity: 4或8
+@return labels: 与mask形状相同的int32标签数组，背景为0，连通域从1开始编号
+@return count: 连通域个数
+'''
+def label_components (mask, connectivity = 8):
+    if connectivity not in (4, 8):
+        raise ValueError(f"connectivity must be 4 or 8, got {connectivity}")
+    rows = mask.shape[0]
+    columns = mask.shape[1]
+
+    # 游程编码并合并连通的游程
+    run_rows, run_starts, run_stops = get_runs(mask)
+    current, previous = get_run_pairs(run_rows, run_starts, run_stops, columns, connectivity)
+    parent = union_find(len(run_rows), current, previous)
+
+    # 根按顺序编号，通过查找表得到每个游程的标签
+    is_root = parent == np.arange(len(parent))
+    root_label = np.cumsum(is_root).astype(np.int32)
+    run_labels = root_label[parent]
+    count = int(np.count_nonzero(is_root))
+
+    # 把游程的标签写回图像
+    labels = np.zeros(rows * columns, dtype = np.int32)
+    lengths = run_stops - run_starts
+    run_offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    positions = np.repeat(run_rows * columns + run_starts, lengths) + np.arange(len(run_offsets)) - run_offsets
+    labels[positions] = np.repeat(run_labels, lengths)
+    return labels.reshape((rows, columns)), count
+
+'''
+@brief 为每个连通域随机上色
+@param labels: 标签数组，背景为0
+@param count: 连通域个数
+@return 彩色图像的uint8数组，背景为黑色
+'''
+def color_labels (labels, count):
+    palette = np.random.randint(0, 256, (count + 1, 3)).astype(np.uint8)
+    palette[0] = 0
+    return palette[labels]  # 一次查表完成上色
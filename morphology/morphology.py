@@ -8,8 +8,13 @@ from matplotlib import pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from matplotlib.figure import Figure
 import struct
+import os
 import math
-from numpy.lib.stride_tricks import sliding_window_view
+from result_cache import ResultCache
+from structuring_element import StructuringElement, create_square_se, create_disk_se, create_diamond_se
+from binary_morphology import get_binary_value, binary_morphology_process, binary_boundary
+from connected_components import label_components, color_labels
+from background_worker import BackgroundWorker
 
 '''
 @brief 获取图像数组
@@ -23,21 +28,39 @@ def get_image_data (image):
     image_array = np.array(image)  # 获取图像的像素数据并转化为数组
     return height, width, image_array
 
-''' 
-@brief 读取raw文件
+'''
+@brief 读取raw文件，以只读的方式将像素数据映射到内存，不会为每个像素创建Python对象
 @param file_name: raw文件路径
-@return raw_array: raw文件图像数组
+@param row_range: 需要读取的行范围(起始行, 结束行)，不包含结束行，为None时读取整幅图像
+@return raw_array: raw文件图像数组，为只读的uint8内存映射数组
 '''
-def read_raw (file_name):
-    # 获取raw文件表示的图片的数据
+def read_raw (file_name, row_range = None):
+    # 读取文件头，文件头为图片的宽度和高度，各占4个字节
     raw_file = open(file_name, "rb")  # 打开文件，以只读、二进制的方式打开
-    raw_width = struct.unpack("i", raw_file.read(4))[0]  # 获取raw文件表示的图片的宽度
-    raw_height = struct.unpack("i", raw_file.read(4))[0]  # 获取raw文件表示的图片的高度
-    raw_data = struct.unpack(f"{raw_width * raw_height}B", raw_file.read())  # 获取raw文件表示的图片的数组
+    header = raw_file.read(8)
     raw_file.close()  # 关闭文件
+    if len(header) < 8:
+        raise ValueError(f"{file_name}不是有效的raw文件：文件头不完整")
+    raw_width, raw_height = struct.unpack("ii", header)  # 获取raw文件表示的图片的宽度和高度
+
+    # 检查文件头与文件大小是否一致
+    if raw_width <= 0 or raw_height <= 0:
+        raise ValueError(f"{file_name}不是有效的raw文件：宽度为{raw_width}，高度为{raw_height}")
+    if os.path.getsize(file_name) != 8 + raw_width * raw_height:
+        raise ValueError(f"{file_name}不是有效的raw文件：文件大小与{raw_width}*{raw_height}的图像不符")
+
+    # 计算需要映射的行范围
+    if row_range is None:
+        row_start, row_stop = 0, raw_height
+    else:
+        row_start, row_stop, _ = slice(*row_range).indices(raw_height)
+    if row_stop <= row_start:
+        raise ValueError(f"行范围{row_range}超出了图像的高度{raw_height}")
 
-    # 将获取到的数组转换为二维数组
-    raw_array = np.array(raw_data).reshape((raw_height, raw_width))
+    # 只映射需要的行，像素数据直接作为uint8数组使用
+    raw_array = np.memmap(file_name, dtype = np.uint8, mode = "r",
+                          offset = 8 + row_start * raw_width,
+                          shape = (row_stop - row_start, raw_width))
 
     return raw_array
 
@@ -55,163 +78,207 @@ def show_transform_image (image_array):
     # 显示分割后的图片
     transform_image_label.config(image = transform_image_tk)
 
-def morphology_process (image_array, method, dilation_se_size = 3, erosion_se_size = 3):
-    # 获取图像行数和列数
+'''
+@brief 使用van Herk/Gil-Werman算法沿一个方向求滑动窗口的最大值或最小值，每个像素的运算量与窗口大小无关
+@param image_array: 图像数组
+@param se_size: 窗口大小
+@param axis: 滑动的方向
+@param operation: np.maximum（膨胀）或np.minimum（腐蚀）
+@return result: 与image_array形状、类型相同的结果，边缘采用零填充
+'''
+def van_herk_filter (image_array, se_size, axis, operation):
+    if se_size <= 1:
+        return np.array(image_array)
+
+    # 把滑动方向换到最后一维
+    array = np.moveaxis(np.asarray(image_array), axis, -1)
+    length = array.shape[-1]
+
+    # 零填充，并把长度补齐为se_size的整数倍，补齐的部分不会落入任何需要的窗口
+    offset = (se_size - 1) // 2
+    blocks = -(-(length + se_size - 1) // se_size)
+    expand_array = np.zeros(array.shape[:-1] + (blocks * se_size,), dtype = array.dtype)
+    expand_array[..., offset : offset + length] = array
+    block_array = expand_array.reshape(array.shape[:-1] + (blocks, se_size))
+
+    # 每个块内从前往后和从后往前的累积最大（小）值
+    prefix = operation.accumulate(block_array, axis = -1).reshape(expand_array.shape)
+    suffix = operation.accumulate(block_array[..., ::-1], axis = -1)[..., ::-1].reshape(expand_array.shape)
+
+    # 窗口[s, s + se_size - 1]最多跨越两个块，结果为后缀值与前缀值中的较大（小）者
+    result = operation(suffix[..., 0 : length], prefix[..., se_size - 1 : se_size - 1 + length])
+    return np.ascontiguousarray(np.moveaxis(result, -1, axis))
+
+'''
+@brief 平移数组，移出的部分丢弃，移入的部分填0
+@param array: 二维数组
+@param row_shift: 结果的第i行取原数组的第i + row_shift行
+@param column_shift: 结果的第j列取原数组的第j + column_shift列
+@return result: 平移后的数组
+'''
+def shift_array (array, row_shift, column_shift):
+    if row_shift == 0 and column_shift == 0:
+        return array
+
+    rows = array.shape[0]
+    columns = array.shape[1]
+    result = np.zeros_like(array)
+    if abs(row_shift) >= rows or abs(column_shift) >= columns:
+        return result
+    result[max(0, -row_shift) : rows - max(0, row_shift), max(0, -column_shift) : columns - max(0, column_shift)] = \
+        array[max(0, row_shift) : rows + min(0, row_shift), max(0, column_shift) : columns + min(0, column_shift)]
+    return result
+
+'''
+@brief 使用任意结构元进行膨胀或腐蚀
+@param image_array: 图像数组
+@param method: "dilation"或"erosion"
+@param se: StructuringElement对象
+@return result: 处理后的图像数组，类型与输入相同，边缘采用零填充
+'''
+def se_morphology (image_array, method, se):
+    operation = np.maximum if method == "dilation" else np.minimum
+    blocks = se.get_blocks()
     rows = image_array.shape[0]
     columns = image_array.shape[1]
 
+    # 矩形块不以原点为中心时需要平移，先按结构元大小零填充，使平移不会丢掉与图像部分重叠的窗口
+    (pad_rows, pad_columns) = se.mask.shape
+    if all(row_offset + (height - 1) // 2 == 0 and column_offset + (width - 1) // 2 == 0 for (row_offset, column_offset, height, width) in blocks):
+        (pad_rows, pad_columns) = (0, 0)
+    expand_array = np.pad(image_array, ((pad_rows, pad_rows), (pad_columns, pad_columns)))
+
+    row_results = {}  # 按行处理的结果，列数相同的矩形块共用
+
+    # 结构元是若干矩形块的并集，结果为各矩形块结果的最大（小）值
+    result = None
+    for (row_offset, column_offset, height, width) in blocks:
+        # 矩形块可分离，先按行再按列进行一维处理
+        if width not in row_results:
+            row_results[width] = van_herk_filter(expand_array, width, 1, operation)
+        block_result = van_herk_filter(row_results[width], height, 0, operation)
+
+        # van_herk_filter的窗口以(height - 1) // 2, (width - 1) // 2为原点，平移到矩形块实际的位置
+        block_result = shift_array(block_result, row_offset + (height - 1) // 2, column_offset + (width - 1) // 2)
+        result = block_result if result is None else operation(result, block_result)
+
+    return np.ascontiguousarray(result[pad_rows : pad_rows + rows, pad_columns : pad_columns + columns])
+
+'''
+@brief 将结构元大小或结构元对象统一转换为结构元对象
+@param se: 整数表示方形结构元的边长，或者StructuringElement对象
+@return StructuringElement对象
+'''
+def to_structuring_element (se):
+    if isinstance(se, StructuringElement):
+        return se
+    return create_square_se(int(se))
+
+'''
+@brief 形态学处理
+@param image_array: 图像数组
+@param method: "dilation"、"erosion"、"opening"或"closing"
+@param dilation_se: 膨胀结构元，整数表示方形结构元的边长，也可以是StructuringElement对象
+@param erosion_se: 腐蚀结构元，整数表示方形结构元的边长，也可以是StructuringElement对象
+@return result: 处理后的图像数组，类型与输入相同
+'''
+def morphology_process (image_array, method, dilation_se = 3, erosion_se = 3):
+    dilation_se = to_structuring_element(dilation_se)
+    erosion_se = to_structuring_element(erosion_se)
+
+    # 二值图像打包为位后用位运算处理
+    binary_value = get_binary_value(image_array)
+    if binary_value is not None:
+        result = binary_morphology_process(image_array != 0, method, dilation_se, erosion_se)
+        return result.astype(np.uint8) * np.uint8(binary_value)
+
     # 膨胀或者腐蚀
-    if method == "dilation" or method == "erosion":
-        # 获取结构元大小
-        if method == "dilation":
-            se_size = dilation_se_size
-        elif method == "erosion":
-            se_size = erosion_se_size
-
-        # 边缘填充，采用零填充
-        new_rows = rows + se_size - 1
-        new_columns = columns + se_size - 1
-        expand_array = np.zeros((new_rows, new_columns))
-        offset = int((se_size - 1) / 2)
-        expand_array[offset : rows + offset, offset : columns + offset] = np.copy(image_array)
-
-        # 形态学处理
-        se = np.ones((se_size, se_size))
-        windows = sliding_window_view(expand_array, (se_size, se_size))
-        if method == "dilation":
-            result = np.max(np.multiply(windows[:, :], se), axis = (-2, -1))
-        elif method == "erosion":
-            result = np.min(np.multiply(windows[:, :], se), axis = (-2, -1))
-    # 开运算或者闭运算
-    elif method == "opening" or method == "closing":
-        # 获取两个结构元大小
-        if method == "opening":
-            se_size_1 = erosion_se_size
-            se_size_2 = dilation_se_size
-        elif method == "closing":
-            se_size_1 = dilation_se_size
-            se_size_2 = erosion_se_size
-
-        # 第一次边缘填充，采用零填充
-        new_rows = rows + se_size_1 - 1
-        new_columns = columns + se_size_1 - 1
-        expand_array_1 = np.zeros((new_rows, new_columns))
-        offset = int((se_size_1 - 1) / 2)
-        expand_array_1[offset : rows + offset, offset : columns + offset] = np.copy(image_array)
-
-        # 第一次形态学处理
-        se_1 = np.ones((se_size_1, se_size_1))
-        windows_1 = sliding_window_view(expand_array_1, (se_size_1, se_size_1))
-        if method == "opening":  # 先进行腐蚀
-            result = np.min(np.multiply(windows_1[:, :], se_1), axis = (-2, -1))
-        elif method == "closing":  # 先进行膨胀
-            result = np.max(np.multiply(windows_1[:, :], se_1), axis = (-2, -1))
-
-        # 第二次边缘填充，采用零填充
-        new_rows = rows + se_size_2 - 1
-        new_columns = columns + se_size_2 - 1
-        expand_array_2 = np.zeros((new_rows, new_columns))
-        offset = int((se_size_2 - 1) / 2)
-        expand_array_2[offset : rows + offset, offset : columns + offset] = np.copy(result)
-
-        # 第二次形态学处理
-        se_2 = np.ones((se_size_2, se_size_2))
-        windows_2 = sliding_window_view(expand_array_2, (se_size_2, se_size_2))
-        if method == "opening":  # 后进行膨胀
-            result = np.max(np.multiply(windows_2[:, :], se_2), axis = (-2, -1))
-        elif method == "closing":  # 后进行腐蚀
-            result = np.min(np.multiply(windows_2[:, :], se_2), axis = (-2, -1))
+    if method == "dilation":
+        result = se_morphology(image_array, "dilation", dilation_se)
+    elif method == "erosion":
+        result = se_morphology(image_array, "erosion", erosion_se)
+    # 开运算：先腐蚀后膨胀
+    elif method == "opening":
+        result = se_morphology(image_array, "erosion", erosion_se)
+        result = se_morphology(result, "dilation", dilation_se)
+    # 闭运算：先膨胀后腐蚀
+    elif method == "closing":
+        result = se_morphology(image_array, "dilation", dilation_se)
+        result = se_morphology(result, "erosion", erosion_se)
 
     return result
 
+'''
+@brief 由界面上选择的结构元形状和大小创建结构元
+@param se_shape: "square"、"disk"或"diamond"
+@param se_size: 结构元的边长
+@return StructuringElement对象
+'''
+def create_structuring_element (se_shape, se_size):
+    if se_shape == "disk":
+        return create_disk_se(se_size // 2)
+    elif se_shape == "diamond":
+        return create_diamond_se(se_size // 2)
+    return create_square_se(se_size)
+
 def morphology_edge (image_array):
-    image_array = morphology_process(image_array, "opening", dilation_se_size = 5, erosion_se_size = 5)
+    image_array = morphology_process(image_array, "opening", dilation_se = 5, erosion_se = 5)
+
+    # 二值图像的边界直接由位运算得到
+    binary_value = get_binary_value(image_array)
+    if binary_value is not None:
+        return binary_boundary(image_array != 0, create_square_se(3)).astype(np.uint8) * np.uint8(binary_value)
+
     transform_image_array = morphology_process(image_array, "erosion")
     result = image_array - transform_image_array
     return result
 
-def connected_analysis (image_array):
-    image_array = morphology_process(image_array, "opening", dilation_se_size = 5, erosion_se_size = 5)
-
-    label_value = 0
-    values = np.zeros(4, dtype = np.int32)
-    labels = np.zeros(4, dtype = np.int32)
-    equ_label = np.arange(image_array.shape[0] * image_array.shape[1])
-
-    expand_array = np.pad(image_array, pad_width = 1, mode = 'constant', constant_values = 0)
-
-    rows = expand_array.shape[0]
-    columns = expand_array.shape[1]
-    array_with_label = np.zeros((rows, columns, 2), dtype = np.int32)
-    array_with_label[:, :, 0] = expand_array
-    array_with_label[:, :, 1] = -1  # 表示未打标签
-
-    for i in range(1, rows - 1):
-        for j in range(1, columns - 1):
-            if array_with_label[i, j, 0] == 255:
-                values[0] = array_with_label[i, j - 1, 0]  # 左
-                values[1] = array_with_label[i - 1, j - 1, 0]  # 左上
-                values[2] = array_with_label[i - 1, j, 0]  # 上
-                values[3] = array_with_label[i - 1, j + 1, 0]  # 右上
-                labels[0] = array_with_label[i, j - 1, 1]
-                labels[1] = array_with_label[i - 1, j - 1, 1]
-                labels[2] = array_with_label[i - 1, j, 1]
-                labels[3] = array_with_label[i - 1, j + 1, 1]
-
-                if np.count_nonzero(values == 255) == 0:  # 周围没有前景点
-                    array_with_label[i, j, 1] = label_value
-                    label_value += 1
-                else:  # 周围有前景点
-                    if np.count_nonzero(labels != -1) == 0:  # 前景点都没有标签
-                        array_with_label[i, j, 1] = label_value
-                        array_with_label[i, j - 1, 1] = label_value if values[0] == 255 else (-1)
-                        array_with_label[i - 1, j - 1, 1] = label_value if values[1] == 255 else (-1)
-                        array_with_label[i - 1, j, 1] = label_value if values[2] == 255 else (-1)
-                        array_with_label[i - 1, j + 1, 1] = label_value if values[3] == 255 else (-1)
-                        label_value += 1
-                    else:  # 有的前景点有标签
-                        labels_1 = labels[labels != -1]
-                        for k in range(labels_1.shape[0]):
-                            # 寻找最小等价标签
-                            while equ_label[labels_1[k]] != labels_1[k]:
-                                labels_1[k] = equ_label[labels_1[k]]
-
-                        min_label = np.min(labels_1)
-                        
-                        # 打标签
-                        array_with_label[i, j, 1] = min_label
-                        array_with_label[i, j - 1, 1] = min_label if (labels[0] == -1 and values[0] == 255) else labels[0]
-                        array_with_label[i - 1, j - 1, 1] = min_label if (labels[1] == -1 and values[1] == 255) else labels[1]
-                        array_with_label[i - 1, j, 1] = min_label if (labels[2] == -1 and values[2] == 255) else labels[2]
-                        array_with_label[i - 1, j + 1, 1] = min_label if (labels[3] == -1 and values[3] == 255) else labels[3]
-
-                        # 修改等价标签
-                        equ_label[labels_1] = min_label
-    
-    # 第二次遍历
-    for i in range(1, rows - 1):
-        for j in range(1, columns - 1):
-            if array_with_label[i, j, 0] == 255:
-                # 寻找最小等价标签
-                while equ_label[array_with_label[i, j, 1]] != array_with_label[i, j, 1]:
-                    array_with_label[i, j, 1] = equ_label[array_with_label[i, j, 1]]
-
-    # 彩色标注
-    temp_array = np.zeros((rows, columns, 3), dtype = np.int32)
-    rgb_array = np.random.randint(0, 256, (np.max(array_with_label[:, :, 1]) + 1, 3))
-    for i in range(np.max(array_with_label[:, :, 1]) + 1):
-        temp_array[array_with_label[:, :, 1] == i] = rgb_array[i]
-
-    result = temp_array[1 : rows - 1, 1 : columns - 1]
+'''
+@brief 连通域标记，并为每个连通域随机上色
+@param image_array: 图像数组
+@param connectivity: 4或8，表示4-邻域或8-邻域
+'''
+def connected_analysis (image_array, connectivity = 8):
+    background_worker.cancel("morphology")  # 丢弃还没有显示的滑动条结果
+
+    image_array = morphology_process(image_array, "opening", dilation_se = 5, erosion_se = 5)
+
+    # 游程编码 + 并查集标记连通域，再一次查表上色
+    labels, count = label_components(image_array == 255, connectivity)
+    result = color_labels(labels, count)
 
     show_transform_image(result)
-    transform_image_tip.config(text = f"8-领域连通域检测，有{label_value}个")
+    transform_image_tip.config(text = f"{connectivity}-领域连通域检测，有{count}个")
+
+'''
+@brief 获取形态学处理结果，图像和参数都相同时直接从缓存中取出
+@param method: 形态学处理方法
+@param dilation_se_size: 膨胀结构元大小
+@param erosion_se_size: 腐蚀结构元大小
+@param se_shape: 结构元形状
+@param array: 图像数组
+@param key: 图像的缓存键
+@return 形态学处理结果
+'''
+def get_morphology_result (method, dilation_se_size, erosion_se_size, se_shape, array, key):
+    # 只把会影响结果的结构元形状和大小作为参数
+    if method == "dilation":
+        params = (se_shape, dilation_se_size)
+    elif method == "erosion":
+        params = (se_shape, erosion_se_size)
+    else:
+        params = (se_shape, dilation_se_size, erosion_se_size)
+
+    dilation_se = create_structuring_element(se_shape, dilation_se_size)
+    erosion_se = create_structuring_element(se_shape, erosion_se_size)
+    return result_cache.get_or_compute(key, method, params, lambda: morphology_process(array, method = method, dilation_se = dilation_se, erosion_se = erosion_se))
 
 def image_morphology (method):
     global morphology_method, dilation_se_size, erosion_se_size, image_array
 
     morphology_method = method
-    transform_image_array = morphology_process(image_array, method = morphology_method, dilation_se_size = dilation_se_size, erosion_se_size = erosion_se_size)
+    background_worker.cancel("morphology")  # 丢弃还没有显示的滑动条结果
+    transform_image_array = get_morphology_result(morphology_method, dilation_se_size, erosion_se_size, se_shape, image_array, image_key)
     
     show_transform_image(transform_image_array)
 
@@ -237,37 +304,57 @@ def image_morphology (method):
 
 def get_image_morphology_edge ():
     global image_array
+    background_worker.cancel("morphology")  # 丢弃还没有显示的滑动条结果
     edge = morphology_edge(image_array)
     show_transform_image(edge)
     scale_frame.grid_forget()
     transform_image_tip.config(text = "边界")
 
-def update_dilation_se_size (se_size):
-    global morphology_method, dilation_se_size, erosion_se_size, image_array
+'''
+@brief 滑动条改变后在后台线程中重新计算，只显示最后一次滑动的结果
+@param none
+'''
+def update_morphology_image ():
+    # 记录提交时的参数，后台计算期间全局变量可能被再次修改
+    method = morphology_method
+    dilation_size = dilation_se_size
+    erosion_size = erosion_se_size
+    shape = se_shape
+    array = image_array
+    key = image_key
+
+    # 还没有选择形态学处理方法时不需要计算
+    if method is None:
+        return
+
+    def show_result (transform_image_array):
+        show_transform_image(transform_image_array)
+        if method == "dilation":
+            transform_image_tip.config(text = f"{method}处理后的图像, 结构元大小为{dilation_size}")
+        elif method == "erosion":
+            transform_image_tip.config(text = f"{method}处理后的图像, 结构元大小为{erosion_size}")
+        elif method == "opening" or method == "closing":
+            transform_image_tip.config(text = f"{method}处理后的图像, 腐蚀结构元大小为{erosion_size}, 膨胀结构元大小为{dilation_size}")
 
-    dilation_se_size = int(se_size)
-    transform_image_array = morphology_process(image_array, method = morphology_method, dilation_se_size = dilation_se_size, erosion_se_size = erosion_se_size)
+    background_worker.submit("morphology", lambda: get_morphology_result(method, dilation_size, erosion_size, shape, array, key), show_result)
 
-    show_transform_image(transform_image_array)
-    if morphology_method == "dilation":
-        transform_image_tip.config(text = f"{morphology_method}处理后的图像, 结构元大小为{dilation_se_size}")
-    elif morphology_method == "opening" or morphology_method == "closing":
-        transform_image_tip.config(text = f"{morphology_method}处理后的图像, 腐蚀结构元大小为{erosion_se_size}, 膨胀结构元大小为{dilation_se_size}")
+def update_dilation_se_size (se_size):
+    global dilation_se_size
+    dilation_se_size = int(se_size)
+    update_morphology_image()
 
 def update_erosion_se_size (se_size):
-    global morphology_method, dilation_se_size, erosion_se_size, image_array
-
+    global erosion_se_size
     erosion_se_size = int(se_size)
-    transform_image_array = morphology_process(image_array, method = morphology_method, dilation_se_size = dilation_se_size, erosion_se_size = erosion_se_size)
+    update_morphology_image()
 
-    show_transform_image(transform_image_array)
-    if morphology_method == "erosion":
-        transform_image_tip.config(text = f"{morphology_method}处理后的图像, 结构元大小为{erosion_se_size}")
-    elif morphology_method == "opening" or morphology_method == "closing":
-        transform_image_tip.config(text = f"{morphology_method}处理后的图像, 腐蚀结构元大小为{erosion_se_size}, 膨胀结构元大小为{dilation_se_size}")
+def update_se_shape (event):
+    global se_shape
+    se_shape = se_shape_combobox.get()
+    update_morphology_image()
 
 def file_operation ():
-    global origin_image_tk, image_array
+    global origin_image_tk, image_array, image_key
 
     # 获取文件路径
     file_path = fd.askopenfilename()
@@ -291,6 +378,10 @@ def file_operation ():
         image = Image.open(file_path).convert('L')
         _, _, image_array = get_image_data(image)
 
+    background_worker.cancel("morphology")  # 丢弃上一幅图像还没有显示的结果
+
+    image_key = result_cache.array_key(image_array)  # 图像内容的哈希，作为缓存的键
+
     # 转换为tkinter能解析的PhotoImage对象   
     origin_image_tk = ImageTk.PhotoImage(image)
 
@@ -305,8 +396,12 @@ if __name__ == '__main__':
     # 初始化参数
     dilation_se_size = 3
     erosion_se_size = 3
+    se_shape = "square"
     morphology_method = None
 
+    # 形态学处理结果缓存
+    result_cache = ResultCache(max_bytes = 256 * 1024 * 1024)
+
     # 创建基本界面
     root = tk.Tk()
     root.title("数字图像处理实验九：形态学处理")  # 设置界面标题
@@ -353,8 +448,10 @@ if __name__ == '__main__':
     closing_button.grid(row = 1, column = 3)
     edge_button = ttk.Button(button_frame, text = "边界获取", command = get_image_morphology_edge)
     edge_button.grid(row = 2, column = 0, columnspan = 4)
-    connected_analysis_button = ttk.Button(button_frame, text = "8-邻域连通域标记", command = lambda: connected_analysis(image_array))
-    connected_analysis_button.grid(row = 3, column = 0, columnspan = 4)
+    connected_analysis_button = ttk.Button(button_frame, text = "8-邻域连通域标记", command = lambda: connected_analysis(image_array, 8))
+    connected_analysis_button.grid(row = 3, column = 0, columnspan = 2)
+    connected_analysis_4_button = ttk.Button(button_frame, text = "4-邻域连通域标记", command = lambda: connected_analysis(image_array, 4))
+    connected_analysis_4_button.grid(row = 3, column = 2, columnspan = 2)
 
     # 创建“退出”按键
     quit_button = ttk.Button(button_frame, text = "退出", command = root.destroy)
@@ -387,5 +484,16 @@ if __name__ == '__main__':
     erosion_se_size_scale = tk.Scale(scale_frame, from_ = 3, to = 45, orient = "horizontal", length = 150, resolution = 2, command = update_erosion_se_size)
     erosion_se_size_scale.grid(row = 1, column = 1)
     erosion_se_size_scale.set(3)
+    se_shape_tip = ttk.Label(scale_frame, text = "结构元形状: ")
+    se_shape_tip.grid(row = 2, column = 0)
+    se_shape_combobox = ttk.Combobox(scale_frame, values = ["square", "disk", "diamond"], state = "readonly", width = 10)
+    se_shape_combobox.grid(row = 2, column = 1)
+    se_shape_combobox.set(se_shape)
+    se_shape_combobox.bind("<<ComboboxSelected>>", update_se_shape)
+    busy_label = ttk.Label(scale_frame)  # 后台计算时显示提示
+    busy_label.grid(row = 3, column = 0, columnspan = 2)
+
+    # 滑动条触发的计算在后台线程中进行
+    background_worker = BackgroundWorker(root, busy_label = busy_label)
 
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,103 @@
+import numpy as np
+import hashlib
+import threading
+from collections import OrderedDict
+
+class ResultCache:
+    '''
+    @brief 初始化
+    @param max_bytes: 缓存占用的最大字节数，超过时淘汰最久未使用的结果
+    '''
+    def __init__ (self, max_bytes = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes  # 字节预算
+        self.current_bytes = 0  # 当前缓存的结果所占的字节数
+        self.entries = OrderedDict()  # 缓存的结果，按使用时间从旧到新排列
+        self.hits = 0  # 命中次数
+        self.misses = 0  # 未命中次数
+        self.lock = threading.Lock()  # 后台线程和界面线程可能同时访问缓存
+
+    '''
+    @brief 计算数组内容的哈希值，作为源图像的键，每幅图像只需在打开时计算一次
+    @param array: 图像数组
+    @return 由形状、数据类型和内容哈希组成的键
+    '''
+    def array_key (self, array):
+        digest = hashlib.blake2b(np.ascontiguousarray(array).data, digest_size = 16).hexdigest()
+        return (array.shape, str(array.dtype), digest)
+
+    '''
+    @brief 计算结果占用的字节数，结果可以是数组或数组组成的元组
+    @param result: 计算结果
+    @return 字节数
+    '''
+    def result_bytes (self, result):
+        if isinstance(result, tuple):
+            return sum(self.result_bytes(item) for item in result)
+        return np.asarray(result).nbytes
+
+    '''
+    @brief 查找缓存，未命中时计算并存入缓存
+    @param source_key: 源图像的键，由array_key得到
+    @param operation: 操作名称
+    @param params: 操作参数组成的元组
+    @param compute: 未命中时调用的无参函数，返回计算结果
+    @return 计算结果，调用者不应修改其内容
+    '''
+    def get_or_compute (self, source_key, operation, params, compute):
+        key = (source_key, operation, params)
+
+        # 命中时移到最新的位置
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+            self.misses += 1
+
+        # 计算时不加锁，不阻塞其他线程查找缓存
+        result = compute()
+
+        # 超过预算的结果不缓存
+        size = self.result_bytes(result)
+        if size > self.max_bytes:
+            return result
+
+        with self.lock:
+            # 其他线程可能已经存入了相同的结果
+            if key in self.entries:
+                return self.entries[key]
+
+            # 淘汰最久未使用的结果，直到能放下新的结果
+            while self.current_bytes + size > self.max_bytes:
+                _, old_result = self.entries.popitem(last = False)
+                self.current_bytes -= self.result_bytes(old_result)
+
+            self.entries[key] = result
+            self.current_bytes += size
+
+        return result
+
+    '''
+    @brief 清空缓存，命中和未命中次数保留
+    @param none
+    '''
+    def clear (self):
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+    '''
+    @brief 获取缓存的统计信息，用于调整字节预算
+    @param none
+    @return 包含命中次数、未命中次数、命中率、结果数量和占用字节数的字典
+    '''
+    def get_stats (self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total > 0 else 0,
+            "entries": len(self.entries),
+            "bytes": self.current_bytes
+        }
@@ -0,0 +1,101 @@
+import numpy as np
+import math
+
+class StructuringElement:
+    '''
+    @brief 初始化
+    @param mask: 二值的结构元数组，原点为((行数 - 1) // 2, (列数 - 1) // 2)
+    '''
+    def __init__ (self, mask):
+        mask = np.asarray(mask).astype(bool)
+        if mask.ndim != 2 or not np.any(mask):
+            raise ValueError("structuring element must be a non-empty 2-D mask")
+        self.mask = mask
+        self.origin = ((mask.shape[0] - 1) // 2, (mask.shape[1] - 1) // 2)
+        self.blocks = None  # 分解得到的矩形块，第一次使用时计算
+
+    '''
+    @brief 将结构元分解为若干矩形块，结构元为这些矩形块的并集
+    @return blocks: 矩形块列表，每个元素为(相对原点的起始行, 相对原点的起始列, 行数, 列数)
+    '''
+    def get_blocks (self):
+        if self.blocks is not None:
+            return self.blocks
+
+        # 找出每一行中连续为1的段
+        padded = np.pad(self.mask, ((0, 0), (1, 1))).astype(np.int8)
+        edges = np.diff(padded, axis = 1)
+        row_runs = []
+        for i in range(self.mask.shape[0]):
+            starts = np.flatnonzero(edges[i] == 1)
+            stops = np.flatnonzero(edges[i] == -1)
+            row_runs.append(set(zip(starts.tolist(), (stops - starts).tolist())))
+
+        # 相邻行中位置和长度都相同的段合并为一个矩形块
+        blocks = []
+        active = {}  # (起始列, 长度) -> 起始行
+        for i in range(self.mask.shape[0] + 1):
+            runs = row_runs[i] if i < self.mask.shape[0] else set()
+            for run in list(active):
+                if run not in runs:
+                    start_row = active.pop(run)
+                    blocks.append((start_row - self.origin[0], run[0] - self.origin[1], i - start_row, run[1]))
+            for run in runs:
+                if run not in active:
+                    active[run] = i
+
+        self.blocks = blocks
+        return blocks
+
+'''
+@brief 创建方形结构元
+@param size: 边长
+@return StructuringElement对象
+'''
+def create_square_se (size):
+    return StructuringElement(np.ones((size, size), dtype = bool))
+
+'''
+@brief 创建圆盘形结构元
+@param radius: 半径
+@return StructuringElement对象，大小为(2 * radius + 1) * (2 * radius + 1)
+'''
+def create_disk_se (radius):
+    y, x = np.ogrid[-radius : radius + 1, -radius : radius + 1]
+    return StructuringElement(x * x + y * y <= radius * radius)
+
+'''
+@brief 创建菱形结构元
+@param radius: 中心到顶点的距离
+@return StructuringElement对象，大小为(2 * radius + 1) * (2 * radius + 1)
+'''
+def create_diamond_se (radius):
+    y, x = np.ogrid[-radius : radius + 1, -radius : radius + 1]
+    return StructuringElement(np.abs(x) + np.abs(y) <= radius)
+
+'''
+@brief 创建线形结构元
+@param length: 线段长度（像素数）
+@param angle: 线段与水平方向的夹角，使用角度制，逆时针为正
+@return StructuringElement对象，线段中点位于原点
+'''
+def create_line_se (length, angle):
+    # 沿主方向每次前进一个像素，保证线段的像素数等于length
+    sin_angle = math.sin(math.radians(angle))
+    cos_angle = math.cos(math.radians(angle))
+    step = max(abs(sin_angle), abs(cos_angle))
+    t = (np.arange(length) - (length - 1) / 2) / step
+    rows = np.floor(-t * sin_angle + 0.5).astype(int)  # 偶数长度时t为半整数，统一向上取整
+    columns = np.floor(t * cos_angle + 0.5).astype(int)
+    half = max(np.max(np.abs(rows)), np.max(np.abs(columns)))
+    mask = np.zeros((2 * half + 1, 2 * half + 1), dtype = bool)
+    mask[rows + half, columns + half] = True
+    return StructuringElement(mask)
+
+'''
+@brief 由用户给定的二值数组创建结构元
+@param mask: 二值数组
+@return StructuringElement对象
+'''
+def create_custom_se (mask):
+    return StructuringElement(mask)
@@ -5,6 +5,7 @@ from PIL import Image
 from PIL import ImageTk
 import numpy as np
 import struct
+import os
 
 # 创建基本的图窗
 root = tk.Tk()
@@ -17,33 +18,101 @@ file_index = 0  # 文件路径元组的索引
 
 image_label = ttk.Label(frame)  # 用于显示图片的Label
 
-''' 
-读取raw文件 
 '''
-def read_raw (file_name):
-    # 获取raw文件表示的图片的数据
+@brief 读取raw文件，以只读的方式将像素数据映射到内存，不会为每个像素创建Python对象
+@param file_name: raw文件路径
+@param row_range: 需要读取的行范围(起始行, 结束行)，不包含结束行，为None时读取整幅图像
+@return raw_array: raw文件图像数组，为只读的uint8内存映射数组
+'''
+def read_raw (file_name, row_range = None):
+    # 读取文件头，文件头为图片的宽度和高度，各占4个字节
     raw_file = open(file_name, "rb")  # 打开文件，以只读、二进制的方式打开
-    raw_width = struct.unpack("i", raw_file.read(4))[0]  # 获取raw文件表示的图片的宽度
-    raw_height = struct.unpack("i", raw_file.read(4))[0]  # 获取raw文件表示的图片的高度
-    raw_data = struct.unpack(f"{raw_width * raw_height}B", raw_file.read())  # 获取raw文件表示的图片的数组
+    header = raw_file.read(8)
     raw_file.close()  # 关闭文件
+    if len(header) < 8:
+        raise ValueError(f"{file_name}不是有效的raw文件：文件头不完整")
+    raw_width, raw_height = struct.unpack("ii", header)  # 获取raw文件表示的图片的宽度和高度
+
+    # 检查文件头与文件大小是否一致
+    if raw_width <= 0 or raw_height <= 0:
+        raise ValueError(f"{file_name}不是有效的raw文件：宽度为{raw_width}，高度为{raw_height}")
+    if os.path.getsize(file_name) != 8 + raw_width * raw_height:
+        raise ValueError(f"{file_name}不是有效的raw文件：文件大小与{raw_width}*{raw_height}的图像不符")
+
+    # 计算需要映射的行范围
+    if row_range is None:
+        row_start, row_stop = 0, raw_height
+    else:
+        row_start, row_stop, _ = slice(*row_range).indices(raw_height)
+    if row_stop <= row_start:
+        raise ValueError(f"行范围{row_range}超出了图像的高度{raw_height}")
 
-    # 将获取到的数组转换为二维数组
-    raw_array = np.array(raw_data).reshape(raw_height, raw_width)
+    # 只映射需要的行，像素数据直接作为uint8数组使用
+    raw_array = np.memmap(file_name, dtype = np.uint8, mode = "r",
+                          offset = 8 + row_start * raw_width,
+                          shape = (row_stop - row_start, raw_width))
 
     return raw_array
 
-''' 
-写入raw文件 
 '''
-def write_raw (file_name, array):
-    row, column = array.shape  # 获取二维数组各维的长度
-    array_new = array.reshape(row * column)
+@brief 写入raw文件，数据按行带分块写入临时文件，全部写完后再重命名为目标文件
+@param file_name: 原raw文件路径，写入的文件名为在其后加上"_new"
+@param array: 二维图像数组，或者按从上到下的顺序依次产生若干行图像数据（行带）的可迭代对象
+@param band_rows: 传入二维数组时，每次写入的行数
+@return file_name_new: 写入的文件路径
+'''
+def write_raw (file_name, array, band_rows = 1024):
     file_name_new = file_name[:len(file_name) - 4] + "_new" + file_name[len(file_name) - 4:]  # 创建一个新的文件名
-    raw_file_new = open(file_name_new, "wb")  # 写入新的文件，每次都先清空再写入
-    data = struct.pack(f"ii{row * column}B", column, row, *array_new)  # 数据转换
-    raw_file_new.write(data)  # 写入数据
-    raw_file_new.close()  # 关闭文件
+    temp_file_name = file_name_new + ".tmp"  # 写入过程中使用的临时文件
+
+    # 传入的是二维数组时，将其切分为行带
+    if isinstance(array, np.ndarray):
+        bands = (array[i : i + band_rows] for i in range(0, array.shape[0], band_rows))
+    else:
+        bands = array
+
+    row = 0  # 已写入的行数
+    column = None  # 图像的列数，由第一个行带确定
+    try:
+        with open(temp_file_name, "wb") as raw_file_new:
+            raw_file_new.write(struct.pack("ii", 0, 0))  # 行数未知，先写入占位的文件头
+
+            # 逐个行带写入像素数据
+            for band in bands:
+                band = np.asarray(band)
+                if band.ndim == 1:  # 单独的一行
+                    band = band.reshape((1, band.shape[0]))
+
+                if column is None:
+                    column = band.shape[1]
+                elif band.shape[1] != column:
+                    raise ValueError(f"行带的列数{band.shape[1]}与图像的列数{column}不一致")
+
+                if band.dtype != np.uint8:
+                    if band.size > 0 and (np.min(band) < 0 or np.max(band) > 255):
+                        raise ValueError("raw文件的像素值需要在[0, 255]之间")
+                    band = band.astype(np.uint8)
+
+                np.ascontiguousarray(band).tofile(raw_file_new)  # 直接写入像素缓冲区
+                row += band.shape[0]
+
+            if column is None:
+                raise ValueError("没有可以写入的图像数据")
+
+            # 写入真正的文件头
+            raw_file_new.seek(0)
+            raw_file_new.write(struct.pack("ii", column, row))
+            raw_file_new.flush()
+            os.fsync(raw_file_new.fileno())
+
+        os.replace(temp_file_name, file_name_new)  # 原子地替换为目标文件
+    except BaseException:
+        # 写入失败时删除临时文件，目标文件保持不变
+        if os.path.exists(temp_file_name):
+            os.remove(temp_file_name)
+        raise
+
+    return file_name_new
 
 ''' 
 显示图片及其相关信息 
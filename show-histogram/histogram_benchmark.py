@@ -0,0 +1,45 @@
+import numpy as np
+import time
+from histogram import get_channel_histogram
+
+'''
+@brief 原来的直方图计算方法，每个通道的每个像素值都遍历一次图像
+@param image_array: H*W*3的图像数组
+@return histogram: 每个通道的直方图
+'''
+def loop_channel_histogram (image_array):
+    histogram = np.zeros((3, 256))
+    for i in range(3):
+        for j in range(256):
+            histogram[i, j] = np.count_nonzero(image_array[:, :, i] == j)
+    return histogram
+
+'''
+@brief 计算函数的平均运行时间
+@param function: 被测试的函数
+@param image_array: 图像数组
+@param repeat: 重复次数
+@return 平均运行时间（秒）和函数的返回值
+'''
+def time_function (function, image_array, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function(image_array)
+    return (time.perf_counter() - start) / repeat, result
+
+if __name__ == '__main__':
+    # 生成4K的RGB图像
+    rng = np.random.default_rng(0)
+    image_array = rng.integers(0, 256, size = (2160, 3840, 3), dtype = np.uint8)
+    megabytes = image_array.nbytes / (1024 * 1024)
+
+    loop_time, loop_result = time_function(loop_channel_histogram, image_array, 1)
+    bincount_time, bincount_result = time_function(get_channel_histogram, image_array, 5)
+
+    # 两种方法的结果需要一致
+    assert np.array_equal(loop_result, bincount_result)
+
+    print(f"图像大小：{image_array.shape}，{megabytes:.1f} MB")
+    print(f"逐值遍历：{loop_time * 1000:.1f} ms，{megabytes / loop_time:.1f} MB/s")
+    print(f"bincount：{bincount_time * 1000:.1f} ms，{megabytes / bincount_time:.1f} MB/s")
+    print(f"加速比：{loop_time / bincount_time:.1f}")
@@ -7,6 +7,8 @@ import numpy as np
 from matplotlib import pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from matplotlib.figure import Figure
+from histogram import get_gray_histogram, get_channel_histogram
+from image_loader import load_image_array, get_load_info
 
 # 创建基本的界面
 root = tk.Tk()
@@ -20,12 +22,8 @@ frame.grid()
 '''
 def gray_histogram (image):
     all_gray = np.arange(256)  # 所有灰度值
-    image_array = np.array(image.getdata())  # 获取图像数据并转化为数组
-    gray_distribution = np.zeros(256)  # 用于统计每个灰度值出现的频率
-
-    # 遍历所有灰度值
-    for i in range(256):
-        gray_distribution[i] = np.count_nonzero(image_array == i) / (image.size[0] * image.size[1])  # 获取图像中每个灰度值出现的频率
+    image_array = load_image_array(image)  # 获取uint8的图像数组
+    gray_distribution = get_gray_histogram(image_array) / (image.size[0] * image.size[1])  # 一次遍历获取图像中每个灰度值出现的频率
 
     # 绘制直方图
     figure.clear()  # 清除图窗中的图像
@@ -42,13 +40,8 @@ def gray_histogram (image):
 '''
 def color_histogram (image):
     all_pixel_value = np.arange(256)  # 所有像素值
-    image_array = np.array(image.getdata())  # 获取图像数据并转化为数组
-    color_distribution = np.zeros((3, 256))  # 用于分别统计每个RGB值出现的频率
-
-    # 遍历所有RGB值
-    for i in range(3):
-        for j in range(256):
-            color_distribution[i, j] = np.count_nonzero(image_array[:, i] == j) / (image.size[0] * image.size[1])  # 分别获取图像中每个RGB值出现的频率
+    image_array = load_image_array(image)  # 获取H*W*3的图像数组，RGB三个通道交错存放
+    color_distribution = get_channel_histogram(image_array, bins = 256) / (image.size[0] * image.size[1])  # 一次遍历分别获取图像中每个RGB值出现的频率
 
     # 绘制直方图
     figure.clear()  # 清除图窗中的图像
@@ -88,6 +81,7 @@ def open_file ():
         gray_histogram(image)
     elif image.mode == "RGB":
         color_histogram(image)
+    load_info_label.config(text = get_load_info())  # 显示读取图像数组的耗时和分配的内存
 
 # 提示语
 tip_1 = ttk.Label(frame, text = "如果打开的图像为灰度图像，则会显示灰度分布直方图")
@@ -99,9 +93,13 @@ tip_2.grid(row = 1, column = 0)
 open_file_button = ttk.Button(frame, text = "打开文件并绘制直方图", command = open_file)  # 将按键的回调定位到open_file函数
 open_file_button.grid(row = 2, column = 0)
 
+# 显示读取耗时和内存的标签
+load_info_label = ttk.Label(frame)
+load_info_label.grid(row = 6, column = 0)
+
 # 创建“quit”按键
 quit_button = ttk.Button(frame, text = "quit", command = root.destroy)
-quit_button.grid(row = 6, column = 0)
+quit_button.grid(row = 7, column = 0)
 
 # 创建图窗
 figure = Figure(figsize = (18, 5), dpi = 100)
@@ -7,6 +7,7 @@ import numpy as np
 from matplotlib import pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from matplotlib.figure import Figure
+from histogram import get_gray_histogram, get_channel_histogram
 import struct
 import math
 
@@ -66,63 +67,104 @@ def get_histogram (image_array):
 
     # 计算归一化直方图
     if len(image_array.shape) == 2:
-        histogram = np.zeros(256)
-        for i in range(256):
-            histogram[i] = np.count_nonzero(image_array == i) / (rows * columns)
+        histogram = get_gray_histogram(image_array, bins = 256) / (rows * columns)
     elif len(image_array.shape) == 3:
-        histogram = np.zeros((3, 256))
-        for i in range(3):
-            for j in range(256):
-                histogram[i, j] = np.count_nonzero(image_array[:, i] == j) / (rows * columns)
+        histogram = get_channel_histogram(image_array, bins = 256) / (rows * columns)  # 第i行是第i个通道的直方图
         
     return histogram
 
+'''
+@brief 计算otsu算法使用的查找表
+@param histogram: 归一化直方图
+@return prob_table: 概率的前缀和，prob_table[i]为灰度值0到i-1的总概率
+@return mean_table: 一阶矩的前缀和，mean_table[i]为灰度值0到i-1的灰度值与概率乘积之和
+'''
+def get_otsu_tables (histogram):
+    levels = np.arange(len(histogram))
+    prob_table = np.concatenate(([0.0], np.cumsum(histogram)))
+    mean_table = np.concatenate(([0.0], np.cumsum(levels * histogram)))
+    return prob_table, mean_table
+
 '''
 @brief 获取由otsu算法得到的图像分割阈值
 @param image_array: 图像数组
 @param min_grayscale: 算法作用范围的下界
 @param max_grayscale: 算法作用范围的上界
-@return otsu_threshold: 通过otsu算法得到的最佳阈值点
+@param histogram: 预先计算好的归一化直方图，为None时由image_array计算
+@return otsu_threshold: 通过otsu算法得到的最佳阈值点，灰度值小于等于该值的像素属于前景
 '''
-def get_otsu_threshold (image_array, min_grayscale, max_grayscale):
-    # 初始化
-    prob1 = 0  # 前景概率
-    prob2 = 0  # 背景概率
-    mean1 = 0  # 前景均值
-    mean2 = 0  # 背景均值
-    var = 0  # 类间方差
-    otsu_threshold = 0  # ostu算法阈值
-
+def get_otsu_threshold (image_array, min_grayscale, max_grayscale, histogram = None):
     # 获取归一化直方图
-    histogram = get_histogram(image_array)
-
-    # 计算算法作用范围的总概率
-    prob = np.sum(histogram[min_grayscale : max_grayscale + 1])
-
-    # 遍历所有灰度值
-    for i in range(min_grayscale, max_grayscale + 1):
-        # 计算前景概率、背景概率、前景均值和背景均值
-        if i == min_grayscale:
-            prob1 = histogram[min_grayscale] / prob
-            prob2 = np.sum(histogram[min_grayscale : max_grayscale + 1]) / prob
-            mean1 = 0
-            mean2 = np.average(np.arange(min_grayscale, max_grayscale + 1), weights = histogram[min_grayscale : max_grayscale + 1] / prob)
-        else:
-            mean1 = (prob1 * mean1 + i * histogram[i] / prob) / (prob1 + histogram[i] / prob)
-            if prob2 - histogram[i] / prob == 0:
-                mean2 = 0
-            else:
-                mean2 = (prob2 * mean2 - i * histogram[i] / prob) / (prob2 - histogram[i] / prob)
-            prob1 = prob1 + histogram[i] / prob
-            prob2 = prob2 - histogram[i] / prob
-
-        # 计算类间方差
-        if prob1 * prob2 * ((mean1 - mean2) ** 2) > var:
-            var = prob1 * prob2 * ((mean1 - mean2) ** 2)
-            otsu_threshold = i
-
+    if histogram is None:
+        histogram = get_histogram(image_array)
+    prob_table, mean_table = get_otsu_tables(histogram)
+
+    # 计算算法作用范围的总概率和总均值
+    prob = prob_table[max_grayscale + 1] - prob_table[min_grayscale]
+    if prob == 0:
+        return min_grayscale
+    mean = (mean_table[max_grayscale + 1] - mean_table[min_grayscale]) / prob
+
+    # 一次性计算所有阈值下的前景概率和前景一阶矩
+    thresholds = np.arange(min_grayscale, max_grayscale + 1)
+    prob1 = (prob_table[thresholds + 1] - prob_table[min_grayscale]) / prob
+    moment1 = (mean_table[thresholds + 1] - mean_table[min_grayscale]) / prob
+
+    # 类间方差 = (mean * prob1 - moment1) ^ 2 / (prob1 * (1 - prob1))
+    numerator = (mean * prob1 - moment1) ** 2
+    denominator = prob1 * (1 - prob1)
+    var = np.zeros(len(thresholds))
+    np.divide(numerator, denominator, out = var, where = denominator > 1e-12)  # 前景或背景为空时类间方差为0
+
+    otsu_threshold = int(thresholds[np.argmax(var)])
     return otsu_threshold
 
+'''
+@brief 获取由多阈值otsu算法得到的图像分割阈值
+@param image_array: 图像数组
+@param classes: 分割的类别数，返回classes - 1个阈值
+@param min_grayscale: 算法作用范围的下界
+@param max_grayscale: 算法作用范围的上界
+@param histogram: 预先计算好的归一化直方图，为None时由image_array计算
+@return otsu_thresholds: 从小到大排列的阈值列表，第j类为(otsu_thresholds[j - 1], otsu_thresholds[j]]
+'''
+def get_multi_otsu_thresholds (image_array, classes, min_grayscale = 0, max_grayscale = 255, histogram = None):
+    levels = max_grayscale - min_grayscale + 1
+    if classes < 2 or classes > levels:
+        raise ValueError(f"classes must be between 2 and {levels}, got {classes}")
+
+    # 获取归一化直方图
+    if histogram is None:
+        histogram = get_histogram(image_array)
+    prob_table, mean_table = get_otsu_tables(histogram)
+
+    # 查找表：score_table[u, v]为灰度区间[u, v]作为一类时对类间方差的贡献 moment ^ 2 / prob
+    start = np.arange(min_grayscale, max_grayscale + 1)[:, None]
+    end = np.arange(min_grayscale, max_grayscale + 1)[None, :]
+    prob = prob_table[end + 1] - prob_table[start]
+    moment = mean_table[end + 1] - mean_table[start]
+    score_table = np.zeros((levels, levels))
+    np.divide(moment ** 2, prob, out = score_table, where = prob > 1e-12)
+    score_table[start > end] = -np.inf  # 区间的起点不能大于终点
+
+    # 动态规划：score[v]为把[0, v]分成c类的最大得分，last_start[c][v]记录最后一类的起点
+    score = score_table[0]
+    last_start = []
+    for _ in range(classes - 1):
+        candidate = np.full((levels, levels), -np.inf)
+        candidate[1:] = score[:-1, None] + score_table[1:]  # candidate[u, v]：最后一类为[u, v]
+        last_start.append(np.argmax(candidate, axis = 0))
+        score = np.max(candidate, axis = 0)
+
+    # 回溯得到各个阈值
+    otsu_thresholds = []
+    end_level = levels - 1
+    for start_level in reversed(last_start):
+        end_level = int(start_level[end_level]) - 1
+        otsu_thresholds.append(end_level + min_grayscale)
+
+    return otsu_thresholds[::-1]
+
 '''
 @brief 分割CT图像
 @param none
@@ -130,8 +172,9 @@ def get_otsu_threshold (image_array, min_grayscale, max_grayscale):
 def threshold_segmentation ():
     global origin_image
     _, _, image_array = get_image_data(origin_image)  # 获取图像数组
-    threshold = get_otsu_threshold(image_array, 0, 255)  # 第一次获取ostu算法的阈值
-    threshold = get_otsu_threshold(image_array, threshold, 255)  # 第二次获取ostu算法的阈值
+    histogram = get_histogram(image_array)  # 两次otsu算法共用同一个直方图
+    threshold = get_otsu_threshold(image_array, 0, 255, histogram = histogram)  # 第一次获取ostu算法的阈值
+    threshold = get_otsu_threshold(image_array, threshold, 255, histogram = histogram)  # 第二次获取ostu算法的阈值
     image_array[image_array < threshold] = 0  # 小于该阈值的像素值置为0
     image_array[image_array >= threshold] = 255  # 大于或等于该阈值的像素值置为255
     show_seg_image(image_array)  # 显示分割后的图像